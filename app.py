@@ -1,12 +1,24 @@
 import streamlit as st
 import pandas as pd
+import io
 from datetime import datetime
 from core.supabase_db import (
-    client,
+    base_client, sign_in, end_session,
     add_income, load_income, delete_income, clear_income_month,
     add_expense, load_expense, delete_expense, clear_expense_month,
-    is_month_locked, lock_month
+    locked_months, lock_month, load_month_snapshot
 )
+from core.export import EXPORT_FORMATS, export_ledger
+from core.analytics import load_period_comparison
+from core.charts import month_charts, trend_chart
+from core.prefetch import prefetch_adjacent
+from core.search import SearchQuery, search_ledger
+from core.recurring import add_template, generate_month, load_templates, retire_template
+from core.money import ledger_frame, row_kobo, split_kobo, to_naira
+from core.memory import memory_report, shared_bytes, total_bytes, track_session
+from core.runtime import get_config
+
+client = base_client()
 
 st.set_page_config(page_title="Biverway Financial OS", layout="wide")
 
@@ -305,6 +317,9 @@ def fmt_amount(amount, compact=False):
             return f"&#8358;{amount:,.0f}"
     return f"&#8358;{amount:,.0f}"
 
+def fmt_kobo(kobo, compact=False):
+    return fmt_amount(to_naira(kobo), compact=compact)
+
 MONTHS = ["January","February","March","April","May","June",
           "July","August","September","October","November","December"]
 
@@ -321,6 +336,9 @@ if "working_month_idx"   not in st.session_state: st.session_state.working_month
 if "working_year"        not in st.session_state: st.session_state.working_year        = datetime.today().year
 if "inc_selected_idx"    not in st.session_state: st.session_state.inc_selected_idx    = 0
 if "exp_selected_idx"    not in st.session_state: st.session_state.exp_selected_idx    = 0
+if "search_page"         not in st.session_state: st.session_state.search_page         = 0
+if "search_sig"          not in st.session_state: st.session_state.search_sig          = None
+if "recurring_notice"    not in st.session_state: st.session_state.recurring_notice    = None
 
 # ====================== MASTHEAD ======================
 st.markdown("""
@@ -358,9 +376,7 @@ if st.session_state.supabase_session is None:
             submit   = st.form_submit_button("Sign In")
         if submit:
             try:
-                res = client.auth.sign_in_with_password({"email": email, "password": password})
-                if res.session:
-                    st.session_state.supabase_session = res.session
+                if sign_in(email, password).session:
                     st.rerun()
             except Exception as e:
                 err = str(e).lower()
@@ -402,8 +418,7 @@ with col_u:
     st.markdown(f'<div class="bw-userbar"><span class="bw-ub-email"><span class="bw-ub-dot"></span>{user_email}</span></div>', unsafe_allow_html=True)
 with col_lo:
     if st.button("Sign Out", key="signout_btn"):
-        client.auth.sign_out()
-        st.session_state.supabase_session = None
+        end_session()
         st.rerun()
 
 # ====================== WORKING PERIOD ======================
@@ -413,8 +428,10 @@ current_year = datetime.today().year
 year_options = list(range(current_year - 4, current_year + 5))
 
 # Build HTML select options
+locked_periods = locked_months()
 month_opts = "".join(
-    f'<option value="{i}" {"selected" if i == st.session_state.working_month_idx else ""}>{m}</option>'
+    f'<option value="{i}" {"selected" if i == st.session_state.working_month_idx else ""}>{m}'
+    f'{" &#128274;" if f"{m[:3]} {st.session_state.working_year}" in locked_periods else ""}</option>'
     for i, m in enumerate(MONTHS)
 )
 year_opts = "".join(
@@ -466,17 +483,20 @@ current_month_full = f"{selected_month_name} {selected_year}"
 
 st.markdown(f'<div class="bw-month">&#9658;&nbsp;{current_month_full}</div>', unsafe_allow_html=True)
 
-month_locked = is_month_locked(current_month)
+month_locked = current_month in locked_periods
 if month_locked:
     st.markdown(f'<div class="bw-lock-banner">&#128274;&nbsp;{current_month_full} is locked &mdash; all records are permanently frozen</div>', unsafe_allow_html=True)
 
 # ====================== LOAD DATA ======================
-income_records  = load_income(current_month)
-expense_records = load_expense(current_month)
-income_df  = pd.DataFrame(income_records)  if income_records  else pd.DataFrame()
-expense_df = pd.DataFrame(expense_records) if expense_records else pd.DataFrame()
-if not income_df.empty:  income_df["amount"]  = pd.to_numeric(income_df["amount"],  errors="coerce").fillna(0)
-if not expense_df.empty: expense_df["amount"] = pd.to_numeric(expense_df["amount"], errors="coerce").fillna(0)
+month_snapshot = load_month_snapshot(current_month) if month_locked else None
+if month_snapshot:
+    income_records  = month_snapshot["income"]
+    expense_records = month_snapshot["expense"]
+else:
+    income_records  = load_income(current_month)
+    expense_records = load_expense(current_month)
+income_df  = ledger_frame(income_records)
+expense_df = ledger_frame(expense_records)
 
 # ====================== INCOME ======================
 st.markdown('<span class="bw-section-label">Income</span>', unsafe_allow_html=True)
@@ -504,8 +524,8 @@ if not month_locked:
             st.session_state.income_form_key += 1
             st.rerun()
 
+rows_html = ""
 if not income_df.empty:
-    rows_html = ""
     for _, row in income_df.iterrows():
         rows_html += (
             f'<div class="bw-record-row">'
@@ -513,13 +533,13 @@ if not income_df.empty:
             f'<span class="rr-source">{row["source"]}</span>'
             f'<span class="rr-meta">{row["income_type"]} &nbsp;&middot;&nbsp; {row.get("notes","") or "&mdash;"}</span>'
             f'</div>'
-            f'<span class="rr-amount">&#8358;{float(row["amount"]):,.0f}</span>'
+            f'<span class="rr-amount">{fmt_kobo(row["amount_kobo"])}</span>'
             f'</div>'
         )
     st.markdown(f'<div class="bw-record-table">{rows_html}</div>', unsafe_allow_html=True)
 
     if not month_locked:
-        inc_labels = [f"{i+1}. {r['source']} \u2014 \u20a6{float(r.get('amount',0)):,.0f}" for i, r in enumerate(income_records)]
+        inc_labels = [f"{i+1}. {r['source']} \u2014 \u20a6{to_naira(row_kobo(r)):,.0f}" for i, r in enumerate(income_records)]
         inc_ids    = [r["id"] for r in income_records]
 
         if st.session_state.edit_income_id is not None:
@@ -532,7 +552,7 @@ if not income_df.empty:
                     src_idx  = src_keys.index(cur_src) if cur_src in src_keys else 0
                     col_ea, col_eb = st.columns(2)
                     with col_ea: new_source = st.selectbox("Source", src_keys, index=src_idx)
-                    with col_eb: new_amount = st.number_input("Amount", min_value=0.0, step=1000.0, value=float(edit_rec.get("amount", 0)), format="%0.0f")
+                    with col_eb: new_amount = st.number_input("Amount", min_value=0.0, step=1000.0, value=to_naira(row_kobo(edit_rec)), format="%0.0f")
                     new_notes = st.text_area("Notes", value=edit_rec.get("notes", "") or "", height=70)
                     col_sv, col_cx = st.columns(2)
                     with col_sv: save_edit   = st.form_submit_button("Save Changes")
@@ -610,24 +630,24 @@ if not month_locked:
             st.session_state.expense_form_key += 1
             st.rerun()
 
+rows_html2 = ""
 if not expense_df.empty:
-    total_exp_display = expense_df["amount"].sum()
-    rows_html2 = ""
+    total_exp_display = expense_df["amount_kobo"].sum()
     for _, row in expense_df.iterrows():
-        share = f"{row['amount']/total_exp_display*100:.0f}%" if total_exp_display > 0 else "0%"
+        share = f"{row['amount_kobo']/total_exp_display*100:.0f}%" if total_exp_display > 0 else "0%"
         rows_html2 += (
             f'<div class="bw-record-row">'
             f'<div class="rr-left">'
             f'<span class="rr-source">{row["category"]}</span>'
             f'<span class="rr-meta">{share} of total &nbsp;&middot;&nbsp; {row.get("description","") or "&mdash;"}</span>'
             f'</div>'
-            f'<span class="rr-amount">&#8358;{float(row["amount"]):,.0f}</span>'
+            f'<span class="rr-amount">{fmt_kobo(row["amount_kobo"])}</span>'
             f'</div>'
         )
     st.markdown(f'<div class="bw-record-table">{rows_html2}</div>', unsafe_allow_html=True)
 
     if not month_locked:
-        exp_labels = [f"{i+1}. {r['category']} \u2014 \u20a6{float(r.get('amount',0)):,.0f}" for i, r in enumerate(expense_records)]
+        exp_labels = [f"{i+1}. {r['category']} \u2014 \u20a6{to_naira(row_kobo(r)):,.0f}" for i, r in enumerate(expense_records)]
         exp_ids    = [r["id"] for r in expense_records]
 
         if st.session_state.edit_expense_id is not None:
@@ -639,7 +659,7 @@ if not expense_df.empty:
                     cat_idx = expense_categories.index(cur_cat) if cur_cat in expense_categories else 0
                     col_ec, col_ed = st.columns(2)
                     with col_ec: new_category   = st.selectbox("Category", expense_categories, index=cat_idx)
-                    with col_ed: new_exp_amount = st.number_input("Amount", min_value=0.0, step=1000.0, value=float(edit_exp.get("amount", 0)), format="%0.0f")
+                    with col_ed: new_exp_amount = st.number_input("Amount", min_value=0.0, step=1000.0, value=to_naira(row_kobo(edit_exp)), format="%0.0f")
                     new_desc = st.text_area("Description", value=edit_exp.get("description", "") or "", height=70)
                     col_sv2, col_cx2 = st.columns(2)
                     with col_sv2: save_exp_edit   = st.form_submit_button("Save Changes")
@@ -697,11 +717,66 @@ else:
     </div>
     """, unsafe_allow_html=True)
 
+# ====================== RECURRING ======================
+with st.expander("Recurring Entries", expanded=st.session_state.recurring_notice is not None):
+    # Messages set before st.rerun() are shown on the following run.
+    if st.session_state.recurring_notice:
+        st.success(st.session_state.recurring_notice)
+        st.session_state.recurring_notice = None
+    templates = load_templates()
+    if templates:
+        tpl_rows = "".join(
+            f'<div class="bw-record-row">'
+            f'<div class="rr-left">'
+            f'<span class="rr-source">{t["label"]}</span>'
+            f'<span class="rr-meta">{t["kind"].title()} &nbsp;&middot;&nbsp; {t.get("notes") or "&mdash;"}</span>'
+            f'</div>'
+            f'<span class="rr-amount">{fmt_kobo(row_kobo(t))}</span>'
+            f'</div>'
+            for t in templates
+        )
+        st.markdown(f'<div class="bw-record-table">{tpl_rows}</div>', unsafe_allow_html=True)
+        col_gen, col_ret = st.columns(2)
+        with col_gen:
+            if not month_locked and st.button(f"Generate for {current_month}", key="gen_recurring_btn"):
+                with st.spinner("Generating..."):
+                    created = generate_month(current_month, templates)
+                st.session_state.recurring_notice = f"{created} recurring entries added." if created else "Recurring entries already present."
+                st.rerun()
+        with col_ret:
+            tpl_labels = [f'{t["label"]} \u2014 \u20a6{to_naira(row_kobo(t)):,.0f}' for t in templates]
+            retire_sel = st.selectbox("Retire", tpl_labels, key="retire_tpl_select", label_visibility="collapsed")
+            if st.button("Retire Template", key="retire_tpl_btn"):
+                retire_template(templates[tpl_labels.index(retire_sel)]["id"])
+                st.rerun()
+    tpl_kind = st.selectbox("Type", ["Income", "Expense"], key="tpl_kind")
+    with st.form("template_form"):
+        col_tl, col_ta = st.columns(2)
+        with col_tl: tpl_label  = st.selectbox("Source" if tpl_kind == "Income" else "Category", list(income_type_map.keys()) if tpl_kind == "Income" else expense_categories)
+        with col_ta: tpl_amount = st.number_input("Amount", min_value=0.0, step=1000.0, format="%0.0f")
+        tpl_notes = st.text_input("Notes", placeholder="Optional context...")
+        submit_tpl = st.form_submit_button("Save Template")
+    if submit_tpl:
+        add_template(
+            tpl_kind.lower(), tpl_label, tpl_amount, tpl_notes,
+            income_type=income_type_map.get(tpl_label) if tpl_kind == "Income" else None,
+            start_month=current_month
+        )
+        st.session_state.recurring_notice = "Template saved."
+        st.rerun()
+
 # ====================== PERFORMANCE ======================
-total_income  = income_df["amount"].sum()  if not income_df.empty  else 0
-total_expense = expense_df["amount"].sum() if not expense_df.empty else 0
-net_surplus   = total_income - total_expense
-savings_rate  = (net_surplus / total_income * 100) if total_income else 0
+if month_snapshot:
+    kpis          = month_snapshot["kpis"]
+    total_income  = kpis["total_income_kobo"]
+    total_expense = kpis["total_expense_kobo"]
+    net_surplus   = kpis["net_surplus_kobo"]
+    savings_rate  = kpis["savings_rate"]
+else:
+    total_income  = int(income_df["amount_kobo"].sum())  if not income_df.empty  else 0
+    total_expense = int(expense_df["amount_kobo"].sum()) if not expense_df.empty else 0
+    net_surplus   = total_income - total_expense
+    savings_rate  = (net_surplus / total_income * 100) if total_income else 0
 
 st.markdown('<span class="bw-section-label">Financial Performance</span>', unsafe_allow_html=True)
 
@@ -710,15 +785,15 @@ st.markdown(f"""
 <div class="bw-kpi-grid">
     <div class="bw-kpi">
         <span class="kpi-label">Total<br>Income</span>
-        <span class="kpi-value">{fmt_amount(total_income, compact=True)}</span>
+        <span class="kpi-value">{fmt_kobo(total_income, compact=True)}</span>
     </div>
     <div class="bw-kpi">
         <span class="kpi-label">Total<br>Expenses</span>
-        <span class="kpi-value">{fmt_amount(total_expense, compact=True)}</span>
+        <span class="kpi-value">{fmt_kobo(total_expense, compact=True)}</span>
     </div>
     <div class="bw-kpi highlight">
         <span class="kpi-label">Net<br>Surplus</span>
-        <span class="kpi-value {surplus_cls}">{fmt_amount(net_surplus, compact=True)}</span>
+        <span class="kpi-value {surplus_cls}">{fmt_kobo(net_surplus, compact=True)}</span>
     </div>
 </div>
 """, unsafe_allow_html=True)
@@ -737,8 +812,9 @@ with st.expander("Performance Analysis", expanded=has_data):
         if savings_rate >= 30:   s_cls, s_txt = "green",  f"Savings rate {savings_rate:.1f}% \u2014 strong surplus discipline"
         elif savings_rate >= 15: s_cls, s_txt = "yellow", f"Savings rate {savings_rate:.1f}% \u2014 stable, room to optimise"
         elif savings_rate >= 1:  s_cls, s_txt = "yellow", f"Savings rate {savings_rate:.1f}% \u2014 margin is thin"
-        else:                    s_cls, s_txt = "red",    f"Deficit \u2014 expenses exceed income by \u20a6{abs(net_surplus):,.0f}"
+        else:                    s_cls, s_txt = "red",    f"Deficit \u2014 expenses exceed income by \u20a6{to_naira(abs(net_surplus)):,.0f}"
         st.markdown(f'<div class="bw-status {s_cls}"><span class="bw-status-dot"></span>{s_txt}</div>', unsafe_allow_html=True)
+        charts = month_charts(current_month, income_records, expense_records)
 
         bar_pct = min(max(savings_rate, 0), 100)
         st.markdown(f"""
@@ -752,15 +828,19 @@ with st.expander("Performance Analysis", expanded=has_data):
         """, unsafe_allow_html=True)
 
         if not income_df.empty:
-            active_income  = income_df[income_df["income_type"] == "Active"]["amount"].sum()
-            passive_income = income_df[income_df["income_type"] == "Passive"]["amount"].sum()
+            if month_snapshot:
+                active_income  = month_snapshot["kpis"]["active_income_kobo"]
+                passive_income = month_snapshot["kpis"]["passive_income_kobo"]
+            else:
+                active_income  = int(income_df.loc[income_df["income_type"] == "Active",  "amount_kobo"].sum())
+                passive_income = int(income_df.loc[income_df["income_type"] == "Passive", "amount_kobo"].sum())
             active_pct     = (active_income  / total_income * 100) if total_income else 0
             passive_pct    = (passive_income / total_income * 100) if total_income else 0
             st.markdown('<p style="font-family:var(--font-disp);font-size:0.7rem;color:var(--cream-mute);margin:18px 0 8px;">Income Structure</p>', unsafe_allow_html=True)
             st.markdown(f"""
             <div>
-                <div class="bw-insight-row"><span class="ir-label">Active Income</span><span class="ir-value">&#8358;{active_income:,.0f}<span class="ir-sub">{active_pct:.0f}%</span></span></div>
-                <div class="bw-insight-row"><span class="ir-label">Passive Income</span><span class="ir-value">&#8358;{passive_income:,.0f}<span class="ir-sub">{passive_pct:.0f}%</span></span></div>
+                <div class="bw-insight-row"><span class="ir-label">Active Income</span><span class="ir-value">{fmt_kobo(active_income)}<span class="ir-sub">{active_pct:.0f}%</span></span></div>
+                <div class="bw-insight-row"><span class="ir-label">Passive Income</span><span class="ir-value">{fmt_kobo(passive_income)}<span class="ir-sub">{passive_pct:.0f}%</span></span></div>
             </div>
             <div style="margin:14px 0 18px;">
                 <div style="display:flex;justify-content:space-between;margin-bottom:7px;">
@@ -770,6 +850,8 @@ with st.expander("Performance Analysis", expanded=has_data):
                 <div class="bw-bar-wrap"><div class="bw-bar-fill" style="width:{passive_pct}%"></div></div>
             </div>
             """, unsafe_allow_html=True)
+            if charts["income_mix"]:
+                st.vega_lite_chart(charts["income_mix"], use_container_width=True, theme=None)
             if active_pct >= 70:
                 st.markdown('<div class="bw-status yellow"><span class="bw-status-dot"></span>Income heavily effort-dependent \u2014 grow passive streams</div>', unsafe_allow_html=True)
             elif passive_pct >= 50:
@@ -778,13 +860,48 @@ with st.expander("Performance Analysis", expanded=has_data):
                 st.markdown('<div class="bw-status yellow"><span class="bw-status-dot"></span>Moderately diversified \u2014 continue growing passive streams</div>', unsafe_allow_html=True)
 
         if not expense_df.empty:
-            sorted_exp = expense_df.sort_values("amount", ascending=False).head(3)
+            sorted_exp = expense_df.sort_values("amount_kobo", ascending=False).head(3)
             st.markdown('<p style="font-family:var(--font-disp);font-size:0.7rem;color:var(--cream-mute);margin:20px 0 8px;">Top Cost Drivers</p>', unsafe_allow_html=True)
             rows = "".join(
-                f'<div class="bw-insight-row"><span class="ir-label">{row["category"]}</span><span class="ir-value">&#8358;{row["amount"]:,.0f}<span class="ir-sub">{row["amount"]/total_expense*100:.0f}%</span></span></div>'
+                f'<div class="bw-insight-row"><span class="ir-label">{row["category"]}</span><span class="ir-value">{fmt_kobo(row["amount_kobo"])}<span class="ir-sub">{row["amount_kobo"]/total_expense*100:.0f}%</span></span></div>'
                 for _, row in sorted_exp.iterrows()
             )
             st.markdown(f'<div>{rows}</div>', unsafe_allow_html=True)
+            if charts["category_share"]:
+                st.markdown('<p style="font-family:var(--font-disp);font-size:0.7rem;color:var(--cream-mute);margin:20px 0 8px;">Category Share</p>', unsafe_allow_html=True)
+                st.vega_lite_chart(charts["category_share"], use_container_width=True, theme=None)
+
+        comparison = load_period_comparison(current_month)
+        if comparison is not None:
+            cur  = comparison["monthly"].loc[current_month]
+            prev = comparison["monthly"].iloc[-2] if len(comparison["monthly"]) > 1 else None
+            def delta_sub(col):
+                pct = cur[f"{col}_delta_pct"]
+                return f"{pct:+.0f}%" if pd.notna(pct) else "new"
+            st.markdown('<p style="font-family:var(--font-disp);font-size:0.7rem;color:var(--cream-mute);margin:20px 0 8px;">Period Comparison</p>', unsafe_allow_html=True)
+            rows = ""
+            if prev is not None:
+                rows += (
+                    f'<div class="bw-insight-row"><span class="ir-label">Income vs last month</span><span class="ir-value">&#8358;{to_naira(cur["income_delta"]):+,.0f}<span class="ir-sub">{delta_sub("income")}</span></span></div>'
+                    f'<div class="bw-insight-row"><span class="ir-label">Expenses vs last month</span><span class="ir-value">&#8358;{to_naira(cur["expense_delta"]):+,.0f}<span class="ir-sub">{delta_sub("expense")}</span></span></div>'
+                )
+            rows += "".join(
+                f'<div class="bw-insight-row"><span class="ir-label">Avg surplus, trailing {w}m</span><span class="ir-value">{fmt_kobo(cur[f"net_avg_{w}"])}</span></div>'
+                for w in (3, 6, 12)
+            )
+            growth = comparison["category_growth"].loc[current_month].dropna()
+            growth = growth[comparison["categories"].loc[current_month][growth.index] > 0]
+            if not growth.empty:
+                top = growth.sort_values(ascending=False).head(3)
+                rows += "".join(
+                    f'<div class="bw-insight-row"><span class="ir-label">{cat} growth</span><span class="ir-value">{pct:+.0f}%</span></div>'
+                    for cat, pct in top.items()
+                )
+            st.markdown(f'<div>{rows}</div>', unsafe_allow_html=True)
+            trend_spec = trend_chart(current_month, comparison)
+            if trend_spec:
+                st.markdown('<p style="font-family:var(--font-disp);font-size:0.7rem;color:var(--cream-mute);margin:20px 0 8px;">Monthly Trend</p>', unsafe_allow_html=True)
+                st.vega_lite_chart(trend_spec, use_container_width=True, theme=None)
 
 # ====================== ALLOCATION ======================
 st.markdown('<span class="bw-section-label">Surplus Allocation</span>', unsafe_allow_html=True)
@@ -803,11 +920,13 @@ with st.expander("Allocation Planner"):
         st.markdown("""<div class="bw-empty" style="border-color:rgba(192,84,74,0.15);background:var(--red-bg);"><span class="bw-empty-icon" style="color:var(--red);">&#9650;</span><span class="bw-empty-text" style="color:var(--red);">No surplus available</span><span class="bw-empty-sub">Reduce expenses to generate allocatable surplus</span></div>""", unsafe_allow_html=True)
     else:
         mode = st.selectbox("Strategy", list(allocation_modes.keys()))
-        allocation_list = [{"Category": cat, "Pct": pct, "Amount": round(net_surplus * pct / 100, 0)} for cat, pct in allocation_modes[mode].items()]
+        alloc_pcts      = allocation_modes[mode]
+        alloc_amounts   = split_kobo(net_surplus, list(alloc_pcts.values()))
+        allocation_list = [{"Category": cat, "Pct": pct, "Amount": amt} for (cat, pct), amt in zip(alloc_pcts.items(), alloc_amounts)]
         total_pct = sum(r["Pct"] for r in allocation_list)
         st.markdown(f'<div class="bw-alloc-total"><span class="at-label">Allocation Status</span><span class="at-check">&#10003;&nbsp;{total_pct}% allocated</span></div>', unsafe_allow_html=True)
         st.markdown('<p style="font-family:var(--font-disp);font-size:0.68rem;color:var(--cream-mute);margin:10px 0 10px;">Live allocation from current surplus</p>', unsafe_allow_html=True)
-        alloc_rows = "".join(f'<div class="bw-alloc-row"><span class="ar-cat">{r["Category"]}</span><span class="ar-pct">{r["Pct"]}%</span><span class="ar-amt">&#8358;{r["Amount"]:,.0f}</span></div>' for r in allocation_list)
+        alloc_rows = "".join(f'<div class="bw-alloc-row"><span class="ar-cat">{r["Category"]}</span><span class="ar-pct">{r["Pct"]}%</span><span class="ar-amt">{fmt_kobo(r["Amount"])}</span></div>' for r in allocation_list)
         st.markdown(f'<div class="bw-alloc-wrap">{alloc_rows}</div>', unsafe_allow_html=True)
         st.markdown('<p style="font-family:var(--font-disp);font-size:0.65rem;color:var(--cream-mute);line-height:1.6;">Updates automatically as records change. Lock the month below to permanently freeze this period.</p>', unsafe_allow_html=True)
 
@@ -827,6 +946,97 @@ else:
                         st.success(f"{current_month_full} has been permanently locked.")
                         st.rerun()
 
+# ====================== SEARCH ======================
+with st.expander("Search History"):
+    search_text = st.text_input("Search notes and descriptions", key="search_text", placeholder="e.g. rent, school fees, bonus")
+    col_sk, col_smin, col_smax = st.columns(3)
+    with col_sk:   search_kind = st.selectbox("Type", ["All", "Income", "Expense"], key="search_kind")
+    with col_smin: search_min  = st.number_input("Min amount", min_value=0.0, step=1000.0, value=0.0, format="%0.0f", key="search_min")
+    with col_smax: search_max  = st.number_input("Max amount", min_value=0.0, step=1000.0, value=0.0, format="%0.0f", key="search_max")
+    cat_options = list(income_type_map.keys()) if search_kind == "Income" else expense_categories if search_kind == "Expense" else list(income_type_map.keys()) + expense_categories
+    search_cats = st.multiselect("Category / Source", cat_options, key="search_cats")
+    search_this_year = st.checkbox(f"Only {selected_year}", key="search_this_year")
+
+    query = SearchQuery(
+        text=search_text,
+        kind=None if search_kind == "All" else search_kind.lower(),
+        categories=tuple(search_cats),
+        min_amount=search_min or None,
+        max_amount=search_max or None,
+        start_month=f"Jan {selected_year}" if search_this_year else None,
+        end_month=f"Dec {selected_year}" if search_this_year else None,
+    )
+    if query != st.session_state.search_sig:
+        st.session_state.search_sig  = query
+        st.session_state.search_page = 0
+
+    if search_text or search_cats or search_min or search_max or search_this_year:
+        results, has_more = search_ledger(query, page=st.session_state.search_page)
+        if results:
+            rows_html3 = "".join(
+                f'<div class="bw-record-row">'
+                f'<div class="rr-left">'
+                f'<span class="rr-source">{r["category"]}</span>'
+                f'<span class="rr-meta">{r["kind"].title()} &nbsp;&middot;&nbsp; {r["month_year"]} &nbsp;&middot;&nbsp; {r.get("notes") or "&mdash;"}</span>'
+                f'</div>'
+                f'<span class="rr-amount">{fmt_kobo(r["amount_kobo"])}</span>'
+                f'</div>'
+                for r in results
+            )
+            st.markdown(f'<div class="bw-record-table">{rows_html3}</div>', unsafe_allow_html=True)
+        else:
+            st.markdown('<div class="bw-empty"><span class="bw-empty-text">No matches</span></div>', unsafe_allow_html=True)
+        col_prev, col_pg, col_next = st.columns(3)
+        with col_prev:
+            if st.session_state.search_page > 0 and st.button("Previous", key="search_prev"):
+                st.session_state.search_page -= 1
+                st.rerun()
+        with col_pg:
+            st.markdown(f'<p style="font-family:var(--font-mono);font-size:0.62rem;color:var(--cream-mute);text-align:center;margin-top:10px;">Page {st.session_state.search_page + 1}</p>', unsafe_allow_html=True)
+        with col_next:
+            if has_more and st.button("Next", key="search_next"):
+                st.session_state.search_page += 1
+                st.rerun()
+
+# ====================== EXPORT ======================
+with st.expander("Export Ledger"):
+    col_fm, col_fy, col_tm, col_ty = st.columns(4)
+    with col_fm: exp_from_month = st.selectbox("From", MONTHS, index=0, key="export_from_month")
+    with col_fy: exp_from_year  = st.selectbox("Year", year_options, index=year_options.index(selected_year), key="export_from_year")
+    with col_tm: exp_to_month   = st.selectbox("To", MONTHS, index=MONTHS.index(selected_month_name), key="export_to_month")
+    with col_ty: exp_to_year    = st.selectbox("Year", year_options, index=year_options.index(selected_year), key="export_to_year")
+    export_fmt = st.selectbox("Format", list(EXPORT_FORMATS.keys()), key="export_format")
+    if st.button("Prepare Export", key="export_btn"):
+        ext = EXPORT_FORMATS[export_fmt]
+        try:
+            # download_button keeps the whole file in server memory, so the in-app export is
+            # buffered in full; only `python -m core.cli export` streams to disk.
+            with st.spinner("Exporting..."):
+                buf = io.BytesIO()
+                export_ledger(f"{exp_from_month[:3]} {exp_from_year}", f"{exp_to_month[:3]} {exp_to_year}", ext, buf)
+                export_data = buf.getvalue()
+            st.download_button(
+                f"Download .{ext}", data=export_data,
+                file_name=f"biverway_ledger_{exp_from_month[:3]}{exp_from_year}_{exp_to_month[:3]}{exp_to_year}.{ext}".lower(),
+                key="export_download"
+            )
+        except Exception as e:
+            st.error(f"Export error: {str(e)}")
+
+# ====================== SESSION MEMORY ======================
+# Account what this session holds; cold sessions' month caches, then the shared caches, are evicted if the process is over budget.
+track_session(frames=(income_df, expense_df), html=(rows_html, rows_html2), snapshot=month_snapshot)
+
+if get_config().memory_metrics:
+    with st.expander("Session Memory"):
+        mem_rows = memory_report()
+        budget   = get_config().memory_budget_bytes
+        st.markdown(f'<p style="font-family:var(--font-mono);font-size:0.62rem;color:var(--cream-mute);">{len(mem_rows)} sessions &nbsp;&middot;&nbsp; {shared_bytes() / 2**20:,.1f} MB shared caches &nbsp;&middot;&nbsp; {total_bytes() / 2**20:,.1f} MB of {budget / 2**20:,.0f} MB budget</p>', unsafe_allow_html=True)
+        st.dataframe(pd.DataFrame(mem_rows), hide_index=True, use_container_width=True)
+
 # ====================== FOOTER ======================
 year = datetime.today().year
 st.markdown(f'<div class="bw-footer">Biverway Financial OS &nbsp;&middot;&nbsp; Built on the Biverway Wealth System &nbsp;&middot;&nbsp; {year}</div>', unsafe_allow_html=True)
+
+# Page is rendered — warm neighbouring months so the next switch is instant.
+prefetch_adjacent(current_month)
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from core.cache import shared_cache
+from core.money import ledger_frame
+from core.supabase_db import data_version, get_user_id, iter_rows, month_range
+from core.runtime import report_error
+
+TRAILING_WINDOWS = (3, 6, 12)
+COMPARISON_SPAN  = 12
+
+
+def period_comparison(income_records, expense_records, months):
+    """Month-over-month deltas, trailing averages and category growth for a range.
+
+    months is the chronological list of "Mon YYYY" labels; months without rows
+    count as zero so rolling windows stay aligned to the calendar. Totals and
+    deltas are int64 kobo; averages and percentages are floats.
+    """
+    income_df  = ledger_frame(income_records)
+    expense_df = ledger_frame(expense_records)
+
+    monthly = pd.DataFrame(index=pd.Index(months, name="month_year"))
+    monthly["income"]  = income_df.groupby("month_year")["amount_kobo"].sum().reindex(months, fill_value=0)  if not income_df.empty  else 0
+    monthly["expense"] = expense_df.groupby("month_year")["amount_kobo"].sum().reindex(months, fill_value=0) if not expense_df.empty else 0
+    monthly = monthly.astype("int64")
+    monthly["net"] = monthly["income"] - monthly["expense"]
+    monthly["savings_rate"] = (monthly["net"] / monthly["income"].where(monthly["income"] != 0) * 100).fillna(0.0)
+
+    for col in ("income", "expense", "net"):
+        monthly[f"{col}_delta"] = monthly[col].diff().fillna(0).astype("int64")
+        monthly[f"{col}_delta_pct"] = monthly[col].pct_change(fill_method=None).replace([float("inf"), float("-inf")], float("nan")) * 100
+        for w in TRAILING_WINDOWS:
+            monthly[f"{col}_avg_{w}"] = monthly[col].rolling(w, min_periods=1).mean()
+
+    if expense_df.empty:
+        categories = pd.DataFrame(index=monthly.index)
+    else:
+        categories = expense_df.pivot_table(
+            index="month_year", columns="category", values="amount_kobo",
+            aggfunc="sum", fill_value=0
+        ).reindex(months, fill_value=0).astype("int64")
+    growth = categories.pct_change(fill_method=None).replace([float("inf"), float("-inf")], float("nan")) * 100
+
+    return {"monthly": monthly, "categories": categories, "category_growth": growth}
+
+
+@shared_cache
+@st.cache_data(show_spinner=False, ttl=600, max_entries=500)
+def _cached_comparison(user_id, end_month, span, version):
+    end    = datetime.strptime(end_month, "%b %Y")
+    y, m   = divmod(end.year * 12 + end.month - span, 12)
+    months = month_range(datetime(y, m + 1, 1).strftime("%b %Y"), end_month)
+    income_records  = [r for page in iter_rows("income",  months[0], end_month) for r in page]
+    expense_records = [r for page in iter_rows("expense", months[0], end_month) for r in page]
+    return period_comparison(income_records, expense_records, months)
+
+
+def load_period_comparison(end_month, span=COMPARISON_SPAN):
+    """Comparison for the span months ending at end_month, cached per user and data version."""
+    try:
+        return _cached_comparison(get_user_id(), end_month, span, data_version())
+    except Exception as e:
+        report_error(f"Analytics error: {str(e)}")
+        return None
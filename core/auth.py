@@ -0,0 +1,124 @@
+"""Per-session Supabase client with refresh-ahead token handling.
+
+SessionManager owns one authenticated client for a signed-in session and
+keeps it across reruns. A background timer refreshes the access token
+REFRESH_MARGIN seconds before it expires, and ensure_fresh() covers the
+case where the timer has not fired yet (e.g. after the machine slept), so
+data calls never go out with an expired token.
+
+Every client is built with gotrue's own auto-refresh and persistence off:
+Supabase rotates refresh tokens and revokes the session when a rotated one
+is reused, so exactly one refresher per session may exist. The timer holds
+its manager weakly, so a session Streamlit has discarded stops refreshing.
+"""
+import logging
+import threading
+import time
+import weakref
+
+from supabase import ClientOptions, create_client
+
+log = logging.getLogger("biverway.auth")
+
+REFRESH_MARGIN = 120
+MIN_REFRESH_DELAY = 5
+
+
+def auth_client(config):
+    """A client that never refreshes or stores a session on its own."""
+    return create_client(
+        config.supabase_url, config.supabase_key,
+        options=ClientOptions(auto_refresh_token=False, persist_session=False),
+    )
+
+
+class SessionManager:
+    def __init__(self, config, session, on_refresh=None, client=None):
+        self.client     = client or auth_client(config)
+        self.on_refresh = on_refresh
+        self.failed     = False
+        self._session   = session
+        self._lock      = threading.Lock()
+        self._timer     = [None]    # boxed so the finalizer can cancel without holding self
+        self._stopped   = False
+        self.client.postgrest.auth(session.access_token)
+        weakref.finalize(self, _cancel, self._timer)
+        self._schedule()
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def expires_at(self):
+        session = self._session
+        if session.expires_at:
+            return session.expires_at
+        return time.time() + (session.expires_in or 3600)
+
+    def needs_refresh(self, now=None):
+        return self.expires_at - (now or time.time()) <= REFRESH_MARGIN
+
+    def ensure_fresh(self):
+        if self.needs_refresh():
+            self.refresh()
+        return self.client
+
+    def refresh(self):
+        """Refresh the token if it is inside the margin; True if a refresh happened."""
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock.
+            if not self.needs_refresh() or self._stopped:
+                return False
+            try:
+                res = self.client.auth.refresh_session(self._session.refresh_token)
+            except Exception as e:
+                self.failed = True
+                log.warning("Token refresh failed: %s", e)
+                raise
+            self._session = res.session
+            self.client.postgrest.auth(res.session.access_token)
+            self.failed = False
+        if self.on_refresh:
+            self.on_refresh(res.session)
+        self._schedule()
+        return True
+
+    def stop(self):
+        self._stopped = True
+        _cancel(self._timer)
+
+    def sign_out(self):
+        """Stop refreshing and revoke this session's tokens (not any other user's)."""
+        self.stop()
+        try:
+            self.client.auth.sign_out()
+        except Exception as e:
+            log.warning("Sign out failed: %s", e)
+
+    def _schedule(self):
+        if self._stopped:
+            return
+        _cancel(self._timer)
+        delay = max(self.expires_at - time.time() - REFRESH_MARGIN, MIN_REFRESH_DELAY)
+        timer = threading.Timer(delay, _refresh_in_background, args=(weakref.ref(self),))
+        timer.daemon = True
+        self._timer[0] = timer
+        timer.start()
+
+
+def _cancel(timer_box):
+    if timer_box[0] is not None:
+        timer_box[0].cancel()
+        timer_box[0] = None
+
+
+def _refresh_in_background(manager_ref):
+    manager = manager_ref()
+    if manager is None:
+        return  # the session was discarded; let it go
+    try:
+        if not manager.refresh():
+            manager._schedule()
+    except Exception:
+        pass  # failed is set; the next data call surfaces it
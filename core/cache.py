@@ -0,0 +1,160 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+def estimate_bytes(value):
+    """Rough serialised size of a JSON-like value."""
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+# Cached functions (st.cache_data / st.cache_resource) whose entries every
+# session in the process shares. core.memory counts them against the memory
+# budget and clears them when evicting cold sessions' month caches is not
+# enough. st.cache_data entries are sized from Streamlit's own stats; shared
+# objects it cannot size report themselves through SHARED_SIZES.
+SHARED_CACHES = []
+SHARED_SIZES  = []
+
+
+def shared_cache(func):
+    """Register a cached function with the process memory budget."""
+    SHARED_CACHES.append(func)
+    return func
+
+
+def shared_size(func):
+    """Register a callable returning bytes held by shared objects Streamlit cannot size."""
+    SHARED_SIZES.append(func)
+    return func
+
+
+class MonthCache:
+    """Per-session LRU of month rows keyed by (table, period), bounded in bytes.
+
+    Thread-safe so background prefetch workers can fill it while the script
+    thread reads from it. A worker claims a key before fetching and stores
+    its rows with that claim; anything that invalidates the key meanwhile
+    (a write, a pushed change, a direct load) cancels the claim, so rows
+    fetched before the change are never stored over it.
+    """
+
+    def __init__(self, owner, max_bytes):
+        self.owner     = owner
+        self.max_bytes = max_bytes
+        self.bytes     = 0
+        self.changes   = 0
+        self.lock_changes = 0
+        self._items    = OrderedDict()
+        self._sizes    = {}
+        self._pending  = {}     # key -> claim id of the in-flight fetch
+        self._claims   = 0
+        self._lock     = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, rows, claim=None):
+        """Store rows; with a claim, only if that claim is still the live one for key."""
+        size = estimate_bytes(rows)
+        with self._lock:
+            if claim is not None and self._pending.get(key) != claim:
+                return
+            self._pending.pop(key, None)
+            if size > self.max_bytes:
+                return
+            self._drop(key)
+            self._items[key] = rows
+            self._sizes[key] = size
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._items)))
+
+    def discard(self, table, period=None):
+        """Drop one month of a table, or every cached month of it when period is None."""
+        with self._lock:
+            for key in [k for k in self._items if k[0] == table and (period is None or k[1] == period)]:
+                self._drop(key)
+            self._cancel(table, period)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._items.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def apply_change(self, event):
+        """Apply a ChangeEvent to cached months in place; uncached months are left alone."""
+        if event.type == "RESYNC":
+            # The feed may have missed changes to this table; refetch on next read.
+            self.discard(event.table)
+            if event.table == "locked_months":
+                with self._lock:
+                    self.lock_changes += 1
+            return
+        if event.table == "locked_months":
+            # Locked months are served from their snapshot; drop the raw rows and
+            # let locked_months() know its set is stale.
+            period = (event.record or event.old_record).get("period")
+            with self._lock:
+                for key in [k for k in self._items if k[1] == period]:
+                    self._drop(key)
+                self._pending = {k: c for k, c in self._pending.items() if k[1] != period}
+                self.lock_changes += 1
+            return
+        row_id = (event.record or event.old_record).get("id")
+        with self._lock:
+            # An in-flight fetch may predate this change; let the next read refetch.
+            self._cancel(event.table, event.record.get("period") or event.old_record.get("period"))
+            touched = False
+            # Remove the old version wherever it is cached (period may have changed).
+            if event.type in ("UPDATE", "DELETE"):
+                for key, rows in list(self._items.items()):
+                    if key[0] == event.table and any(r.get("id") == row_id for r in rows):
+                        self._items[key] = [r for r in rows if r.get("id") != row_id]
+                        touched = True
+            if event.type in ("INSERT", "UPDATE"):
+                key = (event.table, event.record.get("period"))
+                if key in self._items:
+                    rows = [r for r in self._items[key] if r.get("id") != row_id]
+                    self._items[key] = rows + [event.record]
+                    touched = True
+            if touched:
+                for key in self._items:
+                    if key[0] == event.table:
+                        size = estimate_bytes(self._items[key])
+                        self.bytes += size - self._sizes[key]
+                        self._sizes[key] = size
+                self.changes += 1
+
+    def claim(self, key):
+        """Mark key as being fetched; returns a claim id for put(), or None if cached or in flight."""
+        with self._lock:
+            if key in self._items or key in self._pending:
+                return None
+            self._claims += 1
+            self._pending[key] = self._claims
+            return self._claims
+
+    def release(self, key, claim):
+        with self._lock:
+            if self._pending.get(key) == claim:
+                del self._pending[key]
+
+    def _cancel(self, table, period=None):
+        for key in [k for k in self._pending if k[0] == table and (period is None or k[1] == period)]:
+            del self._pending[key]
+
+    def _drop(self, key):
+        if key in self._items:
+            del self._items[key]
+            self.bytes -= self._sizes.pop(key)
@@ -0,0 +1,198 @@
+"""Row-level change feed pushed into every open session's month cache.
+
+Each session's MonthCache subscribes for its user. Inserts, updates and
+deletes arrive as ChangeEvents and are applied to cached months in place,
+so a write from the phone shows up on the laptop's next rerun without a
+full reload.
+
+SupabaseChangeFeed listens on Supabase Realtime (postgres_changes).
+LocalChangeFeed is an in-process pub/sub: writes made through the data
+layer publish to it directly, which is enough for tests and single-process
+deployments.
+
+A RESYNC event means the feed may have missed changes to a table (its
+realtime channel dropped and was rejoined); subscribers should treat
+everything cached for that table as stale.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from dataclasses import dataclass, field
+
+from core.runtime import get_config
+
+log = logging.getLogger("biverway.changefeed")
+
+WATCHED_TABLES = ("income", "expense", "locked_months")
+CHANNEL_CHECK_SECONDS = 30
+
+
+@dataclass
+class ChangeEvent:
+    table: str
+    type: str                      # INSERT | UPDATE | DELETE | RESYNC
+    record: dict = field(default_factory=dict)
+    old_record: dict = field(default_factory=dict)
+
+
+class LocalChangeFeed:
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, subscriber, access_token=None, expires_at=None):
+        """Register an object with an apply_change(event) method; held weakly.
+
+        Safe to call on every rerun: re-subscribing is a no-op.
+        """
+        with self._lock:
+            self._subscribers.setdefault(user_id, weakref.WeakSet()).add(subscriber)
+
+    def publish(self, user_id, event):
+        self._dispatch(user_id, event)
+
+    def update_token(self, user_id, access_token, expires_at=None):
+        pass
+
+    def _dispatch(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.apply_change(event)
+            except Exception as e:
+                log.warning("Change feed subscriber failed: %s", e)
+
+
+class SupabaseChangeFeed(LocalChangeFeed):
+    """Realtime-backed feed on a background event loop.
+
+    Each user gets their own client, and so their own socket. realtime-py
+    pushes set_auth() tokens to every channel on a socket, so a shared socket
+    would authorise one user's channel with another user's JWT and RLS would
+    silently drop their rows.
+
+    Any session of the user keeps the channel authorised: subscribe() hands
+    over its token whenever it outlives the one the channel holds. A channel
+    that fails to join, or that Realtime later closes or errors (typically
+    because its JWT expired with nobody left to refresh it), is torn down;
+    the next subscribe() from a live session rejoins it and sends RESYNC
+    events for whatever was missed meanwhile.
+    """
+
+    def __init__(self, url, key):
+        super().__init__()
+        self._url = url
+        self._key = key
+        self._clients  = {}
+        self._channels = {}
+        self._tokens   = {}     # user_id -> (expires_at, access_token) the channel holds
+        self._dropped  = set()  # users whose channel dropped; resync on rejoin
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="changefeed", daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._watch(), self._loop)
+
+    def subscribe(self, user_id, subscriber, access_token=None, expires_at=None):
+        super().subscribe(user_id, subscriber)
+        if access_token is None:
+            return
+        with self._lock:
+            joined = user_id in self._channels
+            if not joined:
+                self._channels[user_id] = None
+                self._tokens[user_id]   = (expires_at or 0, access_token)
+        if joined:
+            held = self._tokens.get(user_id, (0, None))
+            if access_token != held[1] and (expires_at or 0) > held[0]:
+                self.update_token(user_id, access_token, expires_at)
+        else:
+            asyncio.run_coroutine_threadsafe(self._join(user_id, access_token), self._loop)
+
+    def publish(self, user_id, event):
+        # The database broadcasts every committed write back to us.
+        pass
+
+    def update_token(self, user_id, access_token, expires_at=None):
+        """Hand a newer JWT to the user's realtime socket so the channel keeps passing RLS."""
+        client = self._clients.get(user_id)
+        if client is not None:
+            self._tokens[user_id] = (expires_at or 0, access_token)
+            asyncio.run_coroutine_threadsafe(client.realtime.set_auth(access_token), self._loop)
+
+    async def _join(self, user_id, access_token):
+        from supabase import acreate_client
+        try:
+            client = await acreate_client(self._url, self._key)
+            await client.realtime.set_auth(access_token)
+            self._clients[user_id] = client
+            channel = client.channel(f"ledger-{user_id}")
+            for table in WATCHED_TABLES:
+                channel.on_postgres_changes(
+                    "*", schema="public", table=table, filter=f"user_id=eq.{user_id}",
+                    callback=lambda payload, uid=user_id: self._dispatch(uid, _to_event(payload)),
+                )
+            self._channels[user_id] = channel
+            await channel.subscribe(lambda status, error: self._on_status(user_id, channel, status, error))
+        except Exception as e:
+            with self._lock:
+                self._channels.pop(user_id, None)
+                self._clients.pop(user_id, None)
+                self._tokens.pop(user_id, None)
+            log.warning("Realtime subscribe failed for %s: %s", user_id, e)
+
+    def _on_status(self, user_id, channel, status, error):
+        if status != "SUBSCRIBED":
+            log.warning("Realtime channel for %s: %s %s", user_id, status, error or "")
+            asyncio.run_coroutine_threadsafe(self._leave(user_id, channel), self._loop)
+        elif user_id in self._dropped:
+            self._dropped.discard(user_id)
+            for table in WATCHED_TABLES:
+                self._dispatch(user_id, ChangeEvent(table, "RESYNC"))
+
+    async def _watch(self):
+        """Tear down channels Realtime has closed or errored, so they can be rejoined."""
+        while True:
+            await asyncio.sleep(CHANNEL_CHECK_SECONDS)
+            for user_id, channel in list(self._channels.items()):
+                if channel is not None and (channel.is_closed or channel.is_errored):
+                    await self._leave(user_id, channel)
+
+    async def _leave(self, user_id, channel):
+        with self._lock:
+            if self._channels.get(user_id) is not channel:
+                return      # already left, or rejoined since
+            del self._channels[user_id]
+            client = self._clients.pop(user_id, None)
+            self._tokens.pop(user_id, None)
+            self._dropped.add(user_id)
+        try:
+            await client.realtime.remove_channel(channel)    # closes the socket with its last channel
+        except Exception as e:
+            log.debug("Realtime leave for %s: %s", user_id, e)
+
+
+def _to_event(payload):
+    data = payload.get("data", payload)
+    return ChangeEvent(
+        table=data.get("table"),
+        type=(data.get("type") or data.get("eventType") or "").upper(),
+        record=data.get("record") or data.get("new") or {},
+        old_record=data.get("old_record") or data.get("old") or {},
+    )
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_change_feed():
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            config = get_config()
+            if config.change_feed == "supabase":
+                _feed = SupabaseChangeFeed(config.supabase_url, config.supabase_key)
+            else:
+                _feed = LocalChangeFeed()
+        return _feed
@@ -0,0 +1,163 @@
+"""Vega-Lite specs for the category-share, income-mix and monthly-trend charts.
+
+Specs are built from aggregated rows and cached per (user, period, data
+version), so a rerun that changes nothing reuses the finished spec instead
+of regrouping the month and rebuilding the chart.
+"""
+import streamlit as st
+
+from core.analytics import COMPARISON_SPAN
+from core.cache import shared_cache
+from core.money import ledger_frame, to_naira
+from core.runtime import report_error
+from core.supabase_db import data_version, get_user_id
+
+PALETTE = ["#c9a84c", "#4caf7d", "#d4922a", "#7a9cc6", "#c0544a", "#9a7a34", "#a58bc4", "#5fb3b3"]
+SERIES_COLORS = {"Income": "#4caf7d", "Expenses": "#c0544a", "Net": "#c9a84c"}
+
+_CONFIG = {
+    "background": "transparent",
+    "view":   {"stroke": None},
+    "font":   "Sora, sans-serif",
+    "axis":   {"labelColor": "rgba(232,224,208,0.5)", "titleColor": "rgba(232,224,208,0.5)",
+               "gridColor": "rgba(255,255,255,0.055)", "domainColor": "rgba(255,255,255,0.08)",
+               "tickColor": "rgba(255,255,255,0.08)", "labelFontSize": 10, "titleFontSize": 10},
+    "legend": {"labelColor": "rgba(232,224,208,0.5)", "titleColor": "rgba(232,224,208,0.5)",
+               "labelFontSize": 10, "titleFontSize": 10, "orient": "bottom"},
+}
+
+
+# ── AGGREGATION ─────────────────────────────────────
+
+def category_totals(expense_records):
+    """Expense total and share per category, largest first."""
+    df = ledger_frame(expense_records)
+    if df.empty:
+        return []
+    totals = df.groupby("category")["amount_kobo"].sum().sort_values(ascending=False)
+    grand  = int(totals.sum())
+    return [
+        {"category": cat, "amount": to_naira(int(kobo)), "share": int(kobo) / grand * 100 if grand else 0.0}
+        for cat, kobo in totals.items()
+    ]
+
+def income_totals(income_records):
+    """Income total per (income_type, source)."""
+    df = ledger_frame(income_records)
+    if df.empty:
+        return []
+    totals = df.groupby(["income_type", "source"])["amount_kobo"].sum()
+    return [
+        {"income_type": itype, "source": source, "amount": to_naira(int(kobo))}
+        for (itype, source), kobo in totals.items()
+    ]
+
+def trend_rows(monthly):
+    """Long-form income/expense/net per month from period_comparison()["monthly"]."""
+    return [
+        {"month": month, "order": i, "series": series, "amount": to_naira(int(row[col]))}
+        for i, (month, row) in enumerate(monthly.iterrows())
+        for series, col in (("Income", "income"), ("Expenses", "expense"), ("Net", "net"))
+    ]
+
+
+# ── SPECS ───────────────────────────────────────────
+
+def category_share_spec(rows):
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data":    {"values": rows},
+        "mark":    {"type": "arc", "innerRadius": 55, "stroke": "#080a0e", "strokeWidth": 2},
+        "encoding": {
+            "theta": {"field": "amount", "type": "quantitative", "stack": True},
+            "color": {"field": "category", "type": "nominal", "title": None,
+                      "sort": {"field": "amount", "order": "descending"}, "scale": {"range": PALETTE}},
+            "order": {"field": "amount", "type": "quantitative", "sort": "descending"},
+            "tooltip": [
+                {"field": "category", "title": "Category"},
+                {"field": "amount", "title": "Amount", "format": ",.0f"},
+                {"field": "share", "title": "Share %", "format": ".1f"},
+            ],
+        },
+        "height": 220,
+        "config": _CONFIG,
+    }
+
+def income_mix_spec(rows):
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data":    {"values": rows},
+        "mark":    {"type": "bar", "cornerRadius": 3, "height": 18},
+        "encoding": {
+            "y":     {"field": "income_type", "type": "nominal", "title": None, "sort": ["Active", "Passive"]},
+            "x":     {"field": "amount", "type": "quantitative", "stack": True, "title": None, "axis": {"format": "~s"}},
+            "color": {"field": "source", "type": "nominal", "title": None, "scale": {"range": PALETTE}},
+            "tooltip": [
+                {"field": "source", "title": "Source"},
+                {"field": "income_type", "title": "Type"},
+                {"field": "amount", "title": "Amount", "format": ",.0f"},
+            ],
+        },
+        "height": 90,
+        "config": _CONFIG,
+    }
+
+def monthly_trend_spec(rows):
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data":    {"values": rows},
+        "mark":    {"type": "line", "point": {"size": 24}, "strokeWidth": 2},
+        "encoding": {
+            "x":     {"field": "month", "type": "ordinal", "title": None,
+                      "sort": {"field": "order"}, "axis": {"labelAngle": -40}},
+            "y":     {"field": "amount", "type": "quantitative", "title": None, "axis": {"format": "~s"}},
+            "color": {"field": "series", "type": "nominal", "title": None,
+                      "scale": {"domain": list(SERIES_COLORS), "range": list(SERIES_COLORS.values())}},
+            "tooltip": [
+                {"field": "month", "title": "Month"},
+                {"field": "series", "title": "Series"},
+                {"field": "amount", "title": "Amount", "format": ",.0f"},
+            ],
+        },
+        "height": 220,
+        "config": _CONFIG,
+    }
+
+
+# ── CACHED ENTRY POINTS ─────────────────────────────
+
+# Underscored arguments are not hashed: the month's rows are fully determined
+# by (user_id, month_year, version), so hashing them would only cost time. The
+# ttl bounds staleness from writes made by other processes without a feed.
+@shared_cache
+@st.cache_data(show_spinner=False, ttl=600, max_entries=500)
+def _month_charts(user_id, month_year, version, _income_records, _expense_records):
+    categories = category_totals(_expense_records)
+    income     = income_totals(_income_records)
+    return {
+        "category_share": category_share_spec(categories) if categories else None,
+        "income_mix":     income_mix_spec(income) if income else None,
+    }
+
+@shared_cache
+@st.cache_data(show_spinner=False, ttl=600, max_entries=500)
+def _trend_chart(user_id, end_month, span, version, _comparison):
+    rows = trend_rows(_comparison["monthly"])
+    return monthly_trend_spec(rows) if rows else None
+
+
+def month_charts(month_year, income_records, expense_records):
+    """Category-share and income-mix specs for one month; None where there is no data."""
+    try:
+        return _month_charts(get_user_id(), month_year, data_version(), income_records, expense_records)
+    except Exception as e:
+        report_error(f"Chart error: {str(e)}")
+        return {"category_share": None, "income_mix": None}
+
+def trend_chart(end_month, comparison, span=COMPARISON_SPAN):
+    """Monthly income/expense/net trend spec for a load_period_comparison() result."""
+    try:
+        return _trend_chart(get_user_id(), end_month, span, data_version(), comparison)
+    except Exception as e:
+        report_error(f"Chart error: {str(e)}")
+        return None
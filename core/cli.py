@@ -0,0 +1,189 @@
+"""Headless entry point for batch jobs.
+
+    python -m core.cli --email you@example.com export "Jan 2025" "Dec 2025" --out ledger.csv
+
+Credentials come from SUPABASE_URL / SUPABASE_ANON_KEY and the password
+from BIVERWAY_PASSWORD (prompted for when unset).
+"""
+import argparse
+import csv
+import getpass
+import json
+import os
+import sys
+from datetime import datetime
+
+from core.money import parse_kobo
+from core.runtime import Config, configure
+
+INCOME_TYPES = {
+    "Skill":               "Active",
+    "Salary":              "Active",
+    "Business":            "Passive",
+    "Dividend / Interest": "Passive",
+    "Rental":              "Passive"
+}
+
+
+def parse_month(value):
+    """Accept "Jan 2026", "January 2026" or "2026-01"; return "Jan 2026"."""
+    for fmt in ("%b %Y", "%B %Y", "%Y-%m"):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime("%b %Y")
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Unrecognised month: {value!r}")
+
+
+def sign_in(email, password):
+    from core.supabase_db import sign_in as start_signed_in_session
+    if not start_signed_in_session(email, password).session:
+        raise SystemExit("Sign in failed.")
+
+
+# ── COMMANDS ────────────────────────────────────────
+
+def cmd_import(args):
+    from core.supabase_db import insert_rows, locked_months
+    rows = []
+    with open(args.file, newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        for rec in reader:
+            amount = parse_kobo(rec.get("amount"))
+            if amount is None:
+                raise SystemExit(f"{args.file}:{reader.line_num}: unreadable amount {rec.get('amount')!r}.")
+            month = rec.get("month_year") or args.month
+            if not month:
+                raise SystemExit("Rows without month_year need --month.")
+            month = parse_month(month)
+            if args.table == "income":
+                source = rec["source"]
+                rows.append({
+                    "month_year":  month,
+                    "source":      source,
+                    "income_type": rec.get("income_type") or INCOME_TYPES.get(source, "Active"),
+                    "amount_kobo": amount,
+                    "notes":       rec.get("notes") or ""
+                })
+            else:
+                rows.append({
+                    "month_year":  month,
+                    "category":    rec["category"],
+                    "amount_kobo": amount,
+                    "description": rec.get("description") or ""
+                })
+    frozen = sorted({r["month_year"] for r in rows} & locked_months())
+    if frozen:
+        raise SystemExit(f"Refusing to import into locked months: {', '.join(frozen)}.")
+    for i in range(0, len(rows), args.batch_size):
+        insert_rows(args.table, rows[i:i + args.batch_size])
+    print(f"Imported {len(rows)} {args.table} rows.")
+
+def cmd_clear(args):
+    from core.supabase_db import clear_income_month, clear_expense_month, is_month_locked
+    if is_month_locked(args.month):
+        raise SystemExit(f"{args.month} is locked; its records are frozen.")
+    if args.table in ("income", "both"):
+        clear_income_month(args.month)
+    if args.table in ("expense", "both"):
+        clear_expense_month(args.month)
+    print(f"Cleared {args.table} for {args.month}.")
+
+def cmd_lock(args):
+    from core.supabase_db import is_month_locked, lock_month
+    if is_month_locked(args.month):
+        print(f"{args.month} is already locked.")
+    elif lock_month(args.month):
+        print(f"Locked {args.month}.")
+
+def cmd_export(args):
+    from core.export import export_ledger
+    fmt = args.format or os.path.splitext(args.out)[1].lstrip(".").lower() or "csv"
+    export_ledger(args.start, args.end, fmt, args.out)
+    print(f"Exported {args.start} .. {args.end} to {args.out}.")
+
+def cmd_report(args):
+    from core.supabase_db import is_month_locked, load_month_snapshot, load_income, load_expense, month_kpis
+    if is_month_locked(args.month):
+        kpis = load_month_snapshot(args.month)["kpis"]
+    else:
+        kpis = month_kpis(load_income(args.month), load_expense(args.month))
+    print(json.dumps({"month_year": args.month, **kpis}, indent=2))
+
+
+def cmd_generate(args):
+    from core.recurring import generate_month, load_templates
+    from core.supabase_db import month_range
+    templates = load_templates()
+    for month in month_range(args.start, args.end or args.start):
+        print(f"{month}: {generate_month(month, templates)} entries generated.")
+
+
+def cmd_sync_sheets(args):
+    from core.sheets_sync import open_spreadsheet, sync_worksheet
+    spreadsheet = open_spreadsheet(args.sheet_id)
+    for table, title in (("income", args.income_sheet), ("expense", args.expense_sheet)):
+        stats = sync_worksheet(spreadsheet.worksheet(title), table, args.checkpoint, args.chunk_rows)
+        print(f"{title} -> {table}: {stats['inserted']} inserted, {stats['skipped']} already synced, {stats['locked']} in locked months, {stats['removed']} superseded rows removed.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.cli", description="Biverway Financial OS batch tools")
+    parser.add_argument("--email", default=os.environ.get("BIVERWAY_EMAIL"), help="account email (or BIVERWAY_EMAIL)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="bulk-insert rows from a CSV file")
+    p.add_argument("table", choices=["income", "expense"])
+    p.add_argument("file")
+    p.add_argument("--month", type=parse_month, help="month for rows without a month_year column")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("clear", help="delete all rows for a month")
+    p.add_argument("month", type=parse_month)
+    p.add_argument("--table", choices=["income", "expense", "both"], default="both")
+    p.set_defaults(func=cmd_clear)
+
+    p = sub.add_parser("lock", help="lock a month and freeze its snapshot")
+    p.add_argument("month", type=parse_month)
+    p.set_defaults(func=cmd_lock)
+
+    p = sub.add_parser("export", help="export the ledger for a month range")
+    p.add_argument("start", type=parse_month)
+    p.add_argument("end", type=parse_month)
+    p.add_argument("--out", required=True)
+    p.add_argument("--format", choices=["csv", "parquet", "xlsx"])
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("generate", help="materialise recurring templates for a month or range")
+    p.add_argument("start", type=parse_month)
+    p.add_argument("end", type=parse_month, nargs="?")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("sync-sheets", help="migrate the legacy Google Sheet, sending only new and edited rows")
+    p.add_argument("--sheet-id", default=os.environ.get("BIVERWAY_SHEET_ID"), required=not os.environ.get("BIVERWAY_SHEET_ID"))
+    p.add_argument("--income-sheet", default="Income")
+    p.add_argument("--expense-sheet", default="Expense")
+    p.add_argument("--checkpoint", default="sheets_sync.checkpoint.json")
+    p.add_argument("--chunk-rows", type=int, default=500)
+    p.set_defaults(func=cmd_sync_sheets)
+
+    p = sub.add_parser("report", help="print KPIs for a month as JSON")
+    p.add_argument("month", type=parse_month)
+    p.set_defaults(func=cmd_report)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.email:
+        raise SystemExit("--email or BIVERWAY_EMAIL is required.")
+    session = configure(Config.from_env())
+    sign_in(args.email, os.environ.get("BIVERWAY_PASSWORD") or getpass.getpass("Password: "))
+    args.func(args)
+    return 1 if session.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import csv
+import io
+
+from core.money import row_kobo, to_naira
+from core.supabase_db import PAGE_SIZE, iter_rows
+
+EXPORT_FORMATS = {"CSV": "csv", "Parquet": "parquet", "Excel": "xlsx"}
+LEDGER_COLUMNS = ["kind", "month_year", "category", "income_type", "amount_kobo", "amount", "notes"]
+
+
+def _ledger_row(kind, row):
+    kobo = row_kobo(row)
+    if kind == "income":
+        return ["income", row.get("month_year"), row.get("source"), row.get("income_type"),
+                kobo, to_naira(kobo), row.get("notes") or ""]
+    return ["expense", row.get("month_year"), row.get("category"), "",
+            kobo, to_naira(kobo), row.get("description") or ""]
+
+
+def iter_ledger(start_month, end_month, page_size=PAGE_SIZE):
+    """Yield pages of ledger rows (lists matching LEDGER_COLUMNS)."""
+    for kind in ("income", "expense"):
+        for page in iter_rows(kind, start_month, end_month, page_size):
+            yield [_ledger_row(kind, r) for r in page]
+
+
+# ── WRITERS ─────────────────────────────────────────
+# Each writer consumes one page at a time, so memory stays flat however
+# many months are exported.
+
+def _write_csv(pages, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(LEDGER_COLUMNS)
+    for page in pages:
+        writer.writerows(page)
+    text.flush()
+    text.detach()
+
+def _write_parquet(pages, out):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = pa.schema([
+        ("kind", pa.string()), ("month_year", pa.string()), ("category", pa.string()),
+        ("income_type", pa.string()), ("amount_kobo", pa.int64()), ("amount", pa.float64()),
+        ("notes", pa.string()),
+    ])
+    with pq.ParquetWriter(out, schema) as writer:
+        for page in pages:
+            columns = list(zip(*page))
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+
+def _write_xlsx(pages, out):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Excel export requires openpyxl")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Ledger")
+    ws.append(LEDGER_COLUMNS)
+    for page in pages:
+        for row in page:
+            ws.append(row)
+    wb.save(out)
+
+_WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+
+def export_ledger(start_month, end_month, fmt, out):
+    """Stream the ledger for a month range into a binary file object or path."""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    pages = iter_ledger(start_month, end_month)
+    if isinstance(out, str):
+        with open(out, "wb") as fh:
+            _WRITERS[fmt](pages, fh)
+    else:
+        _WRITERS[fmt](pages, out)
@@ -0,0 +1,151 @@
+"""Per-session memory accounting with a process-wide budget.
+
+Every rerun calls track_session(), which records what the session holds:
+its month cache, the rest of its session state, and what the last render
+produced (month DataFrames, record-table HTML, the locked-month snapshot).
+The cached functions registered with core.cache.shared_cache are shared
+by every session and counted once on top. When the total exceeds
+Config.memory_budget_bytes, the month caches of the least recently active
+sessions are cleared until it fits; if that is not enough and dropping
+the shared caches would make it fit, those are cleared too. Everything evicted is read-through, so it reloads
+on the next rerun that needs it. Sessions are keyed by their month cache,
+since Streamlit's session id is not unique under AppTest, and drop out
+once that cache has been garbage-collected, which happens when Streamlit
+discards the session.
+"""
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+from core.cache import SHARED_CACHES, SHARED_SIZES, MonthCache, estimate_bytes
+from core.runtime import get_config, session_id, session_state
+from core.supabase_db import get_user_id, month_cache
+
+
+def sizeof(value):
+    """Approximate bytes held by one session-state value."""
+    if isinstance(value, MonthCache):
+        return value.bytes
+    if hasattr(value, "memory_usage"):          # pandas DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return estimate_bytes(value)
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+@dataclass
+class SessionUsage:
+    session: str
+    user_id: str
+    cache: weakref.ref
+    state_bytes: int = 0
+    render_bytes: int = 0
+    last_seen: float = 0.0
+    evictions: int = 0
+
+    @property
+    def cache_bytes(self):
+        cache = self.cache()
+        return cache.bytes if cache is not None else 0
+
+    @property
+    def total_bytes(self):
+        return self.cache_bytes + self.state_bytes + self.render_bytes
+
+
+_sessions = {}      # id(month cache) -> SessionUsage
+_lock     = threading.Lock()
+
+
+def track_session(frames=(), html=(), snapshot=None):
+    """Record this session's footprint after a render and enforce the global budget."""
+    cache = month_cache()
+    state = session_state()
+    state_bytes = sum(sizeof(v) for k, v in list(state.items()) if k != "month_cache")
+    render_bytes = (
+        sum(sizeof(f) for f in frames)
+        + sum(sizeof(h) for h in html if h)
+        + (sizeof(snapshot) if snapshot else 0)
+    )
+    key = id(cache)
+    with _lock:
+        usage = _sessions.get(key)
+        if usage is None or usage.cache() is not cache:
+            usage = SessionUsage(session_id(), get_user_id(), weakref.ref(cache))
+            _sessions[key] = usage
+        usage.state_bytes  = state_bytes
+        usage.render_bytes = render_bytes
+        usage.last_seen    = time.time()
+        _prune()
+        _enforce_budget(get_config().memory_budget_bytes, keep=usage)
+    return usage
+
+
+def shared_bytes():
+    """Bytes held by the registered shared caches, counted once for all sessions."""
+    return _data_cache_bytes() + sum(size() for size in SHARED_SIZES)
+
+def _data_cache_bytes():
+    names = {f"{f.__module__}.{f.__qualname__}" for f in SHARED_CACHES}
+    try:
+        # Streamlit has no public per-function size API; this is what its own stats use.
+        from streamlit.runtime.caching.cache_data_api import _data_caches
+        families = _data_caches.get_stats().values()
+    except Exception:
+        return 0
+    return sum(stat.byte_length for stats in families for stat in stats if stat.cache_name in names)
+
+
+def _prune():
+    for key in [k for k, u in _sessions.items() if u.cache() is None]:
+        del _sessions[key]
+
+def _enforce_budget(budget, keep):
+    shared = shared_bytes()
+    total  = sum(u.total_bytes for u in _sessions.values()) + shared
+    # Coldest first; the session being rendered is never evicted.
+    for usage in sorted(_sessions.values(), key=lambda u: u.last_seen):
+        if total <= budget:
+            break
+        cache = usage.cache()
+        if usage is keep or cache is None or not cache.bytes:
+            continue
+        total -= cache.bytes
+        cache.clear()
+        usage.evictions += 1
+    # Session state and renders cannot be evicted; clearing the shared caches
+    # only helps if it actually gets the process under budget.
+    if total > budget and shared and total - shared <= budget:
+        for func in SHARED_CACHES:
+            func.clear()
+
+
+def memory_report():
+    """Rows of bytes held per live session, largest first."""
+    now = time.time()
+    with _lock:
+        _prune()
+        rows = [{
+            "session":      u.session[:8],
+            "user":         (u.user_id or "")[:8],
+            "month_cache":  u.cache_bytes,
+            "state":        u.state_bytes,
+            "render":       u.render_bytes,
+            "total":        u.total_bytes,
+            "idle_s":       round(now - u.last_seen),
+            "evictions":    u.evictions,
+        } for u in _sessions.values()]
+    return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+
+def total_bytes():
+    with _lock:
+        return sum(u.total_bytes for u in _sessions.values()) + shared_bytes()
@@ -0,0 +1,65 @@
+"""Money as integer kobo (1 naira = 100 kobo).
+
+Amounts are stored in amount_kobo (bigint) and summed as int64, so totals
+are exact and never re-coerced from floats. Naira floats only appear at the
+edges: form inputs going in, formatted strings coming out.
+"""
+import re
+from decimal import ROUND_HALF_UP, Decimal
+
+import pandas as pd
+
+KOBO_PER_NAIRA = 100
+
+
+def to_kobo(naira):
+    """Naira amount (float, str or Decimal) -> int kobo, rounding half up."""
+    return int((Decimal(str(naira or 0)) * KOBO_PER_NAIRA).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def parse_kobo(text):
+    """Typed or pasted amount text ("₦12,500.50", "1,500") -> int kobo, or None if unparseable."""
+    cleaned = re.sub(r"[^0-9.\-]", "", str(text or ""))
+    if not cleaned:
+        return None
+    try:
+        return to_kobo(cleaned)
+    except ArithmeticError:
+        return None
+
+def to_naira(kobo):
+    return kobo / KOBO_PER_NAIRA
+
+def row_kobo(row):
+    """amount_kobo of a ledger row; rows written before the kobo column fall back to amount."""
+    kobo = row.get("amount_kobo")
+    return int(kobo) if kobo is not None else to_kobo(row.get("amount"))
+
+
+def ledger_frame(records):
+    """DataFrame of ledger rows with an int64 amount_kobo column."""
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    if "amount_kobo" not in df.columns:
+        df["amount_kobo"] = None
+    missing = df["amount_kobo"].isna()
+    if missing.any():
+        df.loc[missing, "amount_kobo"] = [to_kobo(a) for a in df.loc[missing, "amount"]]
+    df["amount_kobo"] = df["amount_kobo"].astype("int64")
+    return df
+
+
+def split_kobo(total_kobo, weights):
+    """Split total_kobo by integer weights so the parts sum exactly to the total.
+
+    Largest-remainder: each part gets its floor share, and leftover kobo go to
+    the parts with the largest remainders (earlier parts win ties).
+    """
+    weight_sum = sum(weights)
+    if weight_sum == 0:
+        return [0] * len(weights)
+    parts = [total_kobo * w // weight_sum for w in weights]
+    remainders = [total_kobo * w % weight_sum for w in weights]
+    for i in sorted(range(len(weights)), key=lambda i: -remainders[i])[:total_kobo - sum(parts)]:
+        parts[i] += 1
+    return parts
@@ -0,0 +1,56 @@
+"""Warm adjacent months into the session's month cache after a render.
+
+Workers never touch st.session_state: everything they need (cache, token,
+user id) is captured on the script thread and handed over explicitly.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from core.runtime import get_config
+from core.supabase_db import (
+    current_session, fetch_month, get_user_id, locked_months, month_cache, period_key, period_label, rest_client
+)
+
+log = logging.getLogger("biverway.prefetch")
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+def adjacent_periods(month_year, depth):
+    """Periods within depth months either side of month_year, nearest first."""
+    base = period_key(month_year)
+    y, m = divmod(base, 100)
+    index = y * 12 + m - 1
+    periods = []
+    for step in range(1, depth + 1):
+        for i in (index - step, index + step):
+            periods.append((i // 12) * 100 + i % 12 + 1)
+    return periods
+
+
+def _warm(cache, claim, access_token, user_id, table, period):
+    key = (table, period)
+    try:
+        cache.put(key, fetch_month(rest_client(access_token), table, user_id, period), claim=claim)
+    except Exception as e:
+        cache.release(key, claim)
+        log.warning("Prefetch %s %s failed: %s", table, period, e)
+
+
+def prefetch_adjacent(month_year, depth=None):
+    """Queue background loads of the months around month_year that are not cached yet."""
+    session = current_session()
+    if not session:
+        return
+    depth   = get_config().prefetch_depth if depth is None else depth
+    cache   = month_cache()
+    user_id = get_user_id()
+    locked  = locked_months()
+    for period in adjacent_periods(month_year, depth):
+        # Locked months are served from their snapshot, not from raw rows.
+        if period_label(period) in locked:
+            continue
+        for table in ("income", "expense"):
+            claim = cache.claim((table, period))
+            if claim is not None:
+                _executor.submit(_warm, cache, claim, session.access_token, user_id, table, period)
@@ -0,0 +1,104 @@
+import streamlit as st
+
+from core.cache import shared_cache
+from core.money import row_kobo, to_kobo
+from core.runtime import report_error
+from core.supabase_db import (
+    bump_data_version, data_version, get_client, get_user_id, insert_rows, is_month_locked, period_key
+)
+
+
+# ── TEMPLATES ───────────────────────────────────────
+
+def add_template(kind, label, amount, notes="", income_type=None, start_month=None, end_month=None):
+    try:
+        get_client().table("recurring_templates").insert({
+            "user_id":      get_user_id(),
+            "kind":         kind,
+            "label":        label,
+            "income_type":  income_type,
+            "amount_kobo":  to_kobo(amount),
+            "notes":        notes or "",
+            "start_period": period_key(start_month),
+            "end_period":   period_key(end_month) if end_month else None
+        }).execute()
+        bump_data_version(get_user_id())
+    except Exception as e:
+        report_error(f"Add template error: {str(e)}")
+
+@shared_cache
+@st.cache_data(show_spinner=False, ttl=600, max_entries=500)
+def _cached_templates(user_id, version):
+    res = get_client().table("recurring_templates") \
+        .select("*") \
+        .eq("user_id", user_id) \
+        .eq("active", True) \
+        .order("kind") \
+        .order("label") \
+        .execute()
+    return res.data or []
+
+def load_templates():
+    """Active templates, cached per user and data version so reruns skip the round-trip."""
+    try:
+        return _cached_templates(get_user_id(), data_version())
+    except Exception as e:
+        report_error(f"Load templates error: {str(e)}")
+        return []
+
+def retire_template(template_id):
+    """Stop a template from generating; entries it already produced are kept."""
+    try:
+        get_client().table("recurring_templates").update({"active": False}).eq("id", str(template_id)).execute()
+        bump_data_version(get_user_id())
+    except Exception as e:
+        report_error(f"Retire template error: {str(e)}")
+
+
+# ── GENERATION ──────────────────────────────────────
+
+def due_templates(templates, month_year):
+    period = period_key(month_year)
+    return [
+        t for t in templates
+        if t.get("active", True)
+        and t["start_period"] <= period
+        and (t.get("end_period") is None or period <= t["end_period"])
+    ]
+
+def build_entries(templates, month_year):
+    """Income and expense rows for every template due in month_year."""
+    income, expense = [], []
+    for t in due_templates(templates, month_year):
+        if t["kind"] == "income":
+            income.append({
+                "template_id": t["id"],
+                "month_year":  month_year,
+                "source":      t["label"],
+                "income_type": t.get("income_type") or "Active",
+                "amount_kobo": row_kobo(t),
+                "notes":       t.get("notes") or ""
+            })
+        else:
+            expense.append({
+                "template_id": t["id"],
+                "month_year":  month_year,
+                "category":    t["label"],
+                "amount_kobo": row_kobo(t),
+                "description": t.get("notes") or ""
+            })
+    return income, expense
+
+def generate_month(month_year, templates=None):
+    """Materialise due templates for month_year in one bulk write per table.
+
+    Safe to repeat: (template_id, period) is unique, so entries generated on an
+    earlier run are skipped. Returns the number of new rows written.
+    """
+    if is_month_locked(month_year):
+        return 0
+    income, expense = build_entries(load_templates() if templates is None else templates, month_year)
+    written = 0
+    for table, rows in (("income", income), ("expense", expense)):
+        written += len(insert_rows(table, rows, on_conflict="template_id,period") or [])
+    return written
@@ -0,0 +1,119 @@
+"""Host bindings for the data layer.
+
+Inside Streamlit, config comes from st.secrets, per-user state lives in
+st.session_state and errors surface through st.error. Headless callers
+(the CLI, scheduled jobs) call configure() with an explicit Config and
+Session instead and never touch Streamlit.
+"""
+import logging
+import os
+from dataclasses import dataclass
+
+import streamlit as st
+
+log = logging.getLogger("biverway")
+
+
+@dataclass(frozen=True)
+class Config:
+    supabase_url: str
+    supabase_key: str
+    prefetch_depth: int = 1
+    month_cache_bytes: int = 4 * 1024 * 1024
+    change_feed: str = "local"
+    memory_budget_bytes: int = 256 * 1024 * 1024
+    memory_metrics: bool = False
+    search_backend: str = "postgres"
+
+    @classmethod
+    def from_secrets(cls):
+        app = st.secrets.get("app", {})
+        return cls(
+            st.secrets["supabase"]["url"],
+            st.secrets["supabase"]["anon_key"],
+            prefetch_depth=int(app.get("prefetch_depth", cls.prefetch_depth)),
+            month_cache_bytes=int(app.get("month_cache_bytes", cls.month_cache_bytes)),
+            change_feed=app.get("change_feed", "supabase"),
+            memory_budget_bytes=int(app.get("memory_budget_bytes", cls.memory_budget_bytes)),
+            memory_metrics=bool(app.get("memory_metrics", cls.memory_metrics)),
+            search_backend=app.get("search_backend", cls.search_backend),
+        )
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.environ["SUPABASE_URL"],
+            os.environ["SUPABASE_ANON_KEY"],
+            prefetch_depth=int(os.environ.get("BIVERWAY_PREFETCH_DEPTH", cls.prefetch_depth)),
+            month_cache_bytes=int(os.environ.get("BIVERWAY_MONTH_CACHE_BYTES", cls.month_cache_bytes)),
+            change_feed=os.environ.get("BIVERWAY_CHANGE_FEED", cls.change_feed),
+            memory_budget_bytes=int(os.environ.get("BIVERWAY_MEMORY_BUDGET_BYTES", cls.memory_budget_bytes)),
+            search_backend=os.environ.get("BIVERWAY_SEARCH_BACKEND", cls.search_backend),
+        )
+
+
+class Session(dict):
+    """Plain-dict stand-in for st.session_state in headless runs."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = []
+
+
+_config  = None
+_session = None
+
+
+def in_streamlit():
+    """True on a Streamlit script thread (server or AppTest), False in headless runs."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx(suppress_warning=True) is not None
+    except Exception:
+        return False
+
+
+def configure(config=None, session=None):
+    """Bind the data layer to an explicit config and session (headless use)."""
+    global _config, _session
+    _config  = config or Config.from_env()
+    _session = session if session is not None else Session()
+    return _session
+
+
+def get_config():
+    global _config
+    if _config is None:
+        _config = Config.from_secrets() if in_streamlit() else Config.from_env()
+    return _config
+
+
+def session_state():
+    """The current session's state.
+
+    Off a script thread there is no session to fall back to: a shared global
+    would leak one user's auth and cache into every other caller, so headless
+    code must call configure() first.
+    """
+    if _session is not None:
+        return _session
+    if in_streamlit():
+        return st.session_state
+    raise RuntimeError("No session: call configure() before using the data layer outside Streamlit")
+
+
+def session_id():
+    """The Streamlit session id on a script thread, "headless" otherwise."""
+    if _session is None and in_streamlit():
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx().session_id
+    return "headless"
+
+
+def report_error(message):
+    state = session_state()
+    if isinstance(state, Session):
+        state.errors.append(message)
+        log.error(message)
+    else:
+        st.error(message)
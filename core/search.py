@@ -0,0 +1,225 @@
+"""Search over the whole ledger history.
+
+search_ledger() queries the ledger_entries view, whose search_tsv column is
+GIN-indexed in Postgres (migration 003). With search_backend = "local" it
+instead searches a LocalSearchIndex: the user's history loaded into an
+in-memory SQLite FTS5 table. The index is built once per user and then
+kept current from the change feed, one row per event, so writes do not
+rebuild it; a RESYNC (the feed may have missed events) rebuilds it on the
+next search. It costs a full copy of each active user's history in
+process memory, so prefer the Postgres backend where migration 003 is
+available.
+"""
+import re
+import sqlite3
+import threading
+import weakref
+from dataclasses import dataclass
+
+import streamlit as st
+
+from core.cache import shared_cache, shared_size
+from core.money import row_kobo, to_kobo
+from core.runtime import get_config, report_error
+from core.changefeed import get_change_feed
+from core.supabase_db import get_client, get_user_id, iter_rows, period_key
+
+SEARCH_PAGE_SIZE = 25
+RESULT_COLUMNS   = ["id", "kind", "month_year", "period", "category", "income_type", "amount_kobo", "notes"]
+
+
+@dataclass
+class SearchQuery:
+    text: str = ""
+    kind: str = None               # "income" | "expense" | None for both
+    categories: tuple = ()         # expense categories or income sources
+    min_amount: float = None       # naira
+    max_amount: float = None
+    start_month: str = None
+    end_month: str = None
+
+
+def _terms(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def search_ledger(query, page=0, page_size=SEARCH_PAGE_SIZE):
+    """One page of matches, newest period first; returns (rows, has_more)."""
+    try:
+        if get_config().search_backend == "local":
+            return _local_index(get_user_id()).search(query, page, page_size)
+        q = get_client().table("ledger_entries") \
+            .select(",".join(RESULT_COLUMNS)) \
+            .eq("user_id", get_user_id())
+        terms = _terms(query.text)
+        if terms:
+            # filter() rather than text_search(): the latter ends the builder chain.
+            q = q.filter("search_tsv", "fts(simple)", " & ".join(terms))
+        if query.kind:
+            q = q.eq("kind", query.kind)
+        if query.categories:
+            q = q.in_("category", list(query.categories))
+        if query.min_amount is not None:
+            q = q.gte("amount_kobo", to_kobo(query.min_amount))
+        if query.max_amount is not None:
+            q = q.lte("amount_kobo", to_kobo(query.max_amount))
+        if query.start_month:
+            q = q.gte("period", period_key(query.start_month))
+        if query.end_month:
+            q = q.lte("period", period_key(query.end_month))
+        # Fetch one extra row to learn whether another page exists without a count(*).
+        # ids are only unique per table, so kind is part of the sort key.
+        start = page * page_size
+        res = q.order("period", desc=True).order("kind").order("id").range(start, start + page_size).execute()
+        rows = res.data or []
+        return rows[:page_size], len(rows) > page_size
+    except Exception as e:
+        report_error(f"Search error: {str(e)}")
+        return [], False
+
+
+class LocalSearchIndex:
+    """In-memory SQLite FTS5 index over ledger rows, with search_ledger's filters.
+
+    Subscribed to the change feed, it applies row events in place; loader
+    is how it (re)reads the full history, at first use and after a RESYNC.
+    """
+
+    def __init__(self, loader=None):
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock   = threading.Lock()
+        self._loader = loader
+        self.stale   = loader is not None
+        self._db.execute(
+            "CREATE TABLE entries (rowid INTEGER PRIMARY KEY, id TEXT, kind TEXT, month_year TEXT,"
+            " period INTEGER, category TEXT, income_type TEXT, amount_kobo INTEGER, notes TEXT)"
+        )
+        self._db.execute("CREATE INDEX entries_period_idx ON entries (period)")
+        self._db.execute(
+            "CREATE VIRTUAL TABLE entries_fts USING fts5(category, notes, content='entries', content_rowid='rowid')"
+        )
+
+    @property
+    def bytes(self):
+        with self._lock:
+            pages     = self._db.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return pages * page_size
+
+    def add(self, kind, rows):
+        """Index raw income or expense rows as returned by the data layer."""
+        with self._lock:
+            self._add(kind, rows)
+
+    def apply_change(self, event):
+        """Change-feed hook: replace, add or drop one row; RESYNC marks the index for rebuild."""
+        if event.table not in ("income", "expense"):
+            return
+        if event.type == "RESYNC":
+            self.stale = True
+            return
+        with self._lock:
+            self._remove(event.table, (event.record or event.old_record).get("id"))
+            if event.type in ("INSERT", "UPDATE"):
+                self._add(event.table, [event.record])
+            else:
+                self._db.commit()
+
+    def _rebuild(self):
+        # Under the lock for the whole load: events published meanwhile wait
+        # and are applied on top, so none is lost to the reload.
+        with self._lock:
+            if not self.stale:
+                return
+            self._db.execute("INSERT INTO entries_fts (entries_fts) VALUES ('delete-all')")
+            self._db.execute("DELETE FROM entries")
+            for kind, rows in self._loader():
+                self._add(kind, rows)
+            self.stale = False
+
+    def _remove(self, kind, row_id):
+        for rowid, category, notes in self._db.execute(
+            "SELECT rowid, category, notes FROM entries WHERE kind = ? AND id = ?", (kind, str(row_id))
+        ).fetchall():
+            self._db.execute(
+                "INSERT INTO entries_fts (entries_fts, rowid, category, notes) VALUES ('delete', ?, ?, ?)",
+                (rowid, category or "", notes or ""),
+            )
+            self._db.execute("DELETE FROM entries WHERE rowid = ?", (rowid,))
+
+    def _add(self, kind, rows):
+        for r in rows:
+            category = r.get("source") if kind == "income" else r.get("category")
+            notes    = r.get("notes") if kind == "income" else r.get("description")
+            period   = r.get("period") or period_key(r["month_year"])
+            cur = self._db.execute(
+                "INSERT INTO entries (id, kind, month_year, period, category, income_type, amount_kobo, notes)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(r.get("id")), kind, r.get("month_year"), period, category,
+                 r.get("income_type") if kind == "income" else None, row_kobo(r), notes or ""),
+            )
+            self._db.execute(
+                "INSERT INTO entries_fts (rowid, category, notes) VALUES (?, ?, ?)",
+                (cur.lastrowid, category or "", notes or ""),
+            )
+        self._db.commit()
+
+    def search(self, query, page=0, page_size=SEARCH_PAGE_SIZE):
+        if self.stale:
+            self._rebuild()
+        sql, params = ["SELECT " + ", ".join(f"e.{c}" for c in RESULT_COLUMNS) + " FROM entries e"], []
+        where = []
+        terms = _terms(query.text)
+        if terms:
+            sql.append("JOIN entries_fts f ON f.rowid = e.rowid")
+            where.append("entries_fts MATCH ?")
+            params.append(" AND ".join(f'"{t}"' for t in terms))
+        if query.kind:
+            where.append("e.kind = ?")
+            params.append(query.kind)
+        if query.categories:
+            where.append(f"e.category IN ({', '.join('?' * len(query.categories))})")
+            params.extend(query.categories)
+        if query.min_amount is not None:
+            where.append("e.amount_kobo >= ?")
+            params.append(to_kobo(query.min_amount))
+        if query.max_amount is not None:
+            where.append("e.amount_kobo <= ?")
+            params.append(to_kobo(query.max_amount))
+        if query.start_month:
+            where.append("e.period >= ?")
+            params.append(period_key(query.start_month))
+        if query.end_month:
+            where.append("e.period <= ?")
+            params.append(period_key(query.end_month))
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY e.period DESC, e.kind, e.id LIMIT ? OFFSET ?")
+        params.extend([page_size + 1, page * page_size])
+        with self._lock:
+            rows = [dict(zip(RESULT_COLUMNS, r)) for r in self._db.execute(" ".join(sql), params).fetchall()]
+        return rows[:page_size], len(rows) > page_size
+
+
+_live_indexes = weakref.WeakSet()
+
+
+@shared_size
+def _index_bytes():
+    return sum(index.bytes for index in list(_live_indexes))
+
+
+def _history():
+    for kind in ("income", "expense"):
+        for page in iter_rows(kind):
+            yield kind, page
+
+
+@shared_cache
+@st.cache_resource(show_spinner=False, ttl=600, max_entries=50)
+def _local_index(user_id):
+    index = LocalSearchIndex(loader=_history)
+    _live_indexes.add(index)
+    # Subscribe before the first load so no change can slip in between.
+    get_change_feed().subscribe(user_id, index)
+    return index
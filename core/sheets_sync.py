@@ -0,0 +1,193 @@
+"""Migrate / sync the legacy Google Sheets ledger into Supabase.
+
+Worksheets are read in row chunks and mapped onto the income/expense
+schema. Every row gets a content hash (plus an occurrence number, so two
+identical entries in one month stay two rows); hashes already in Supabase
+are skipped, so re-runs only send the diff. Each chunk is written with one
+bulk upsert and then checkpointed to a JSON file, so an interrupted run
+resumes where it stopped.
+
+A run that reaches the end of the sheet has seen every row's hash. Synced
+rows whose hash it did not see were edited or removed in the sheet, so
+they are deleted; an edited row comes back under its new hash. Rows in
+locked months are never touched. The worksheet is therefore the source of
+truth for every sheet-synced row of its table: sync one worksheet per
+table. Finishing also clears the checkpoint, so the next run rescans the
+whole sheet.
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+from core.money import parse_kobo
+from core.supabase_db import PAGE_SIZE, delete_synced_rows, get_client, get_user_id, insert_rows, locked_months
+
+SYNC_CHUNK_ROWS = 500
+
+_MONTH_KEYS  = ("month_year", "month", "period")
+_AMOUNT_KEYS = ("amount", "value")
+_FIELDS = {
+    "income":  {"label": ("source", "income_source"), "type": ("income_type", "type"), "text": ("notes", "note", "description")},
+    "expense": {"label": ("category", "expense_category"), "type": (), "text": ("description", "notes", "note")},
+}
+
+
+def open_spreadsheet(sheet_id, service_account_info=None):
+    try:
+        import gspread
+        from google.oauth2.service_account import Credentials
+    except ImportError:
+        raise RuntimeError("Sheets sync requires gspread and google-auth")
+    if service_account_info is None:
+        with open(os.environ["GOOGLE_SERVICE_ACCOUNT_FILE"], encoding="utf-8") as fh:
+            service_account_info = json.load(fh)
+    credentials = Credentials.from_service_account_info(
+        service_account_info, scopes=["https://www.googleapis.com/auth/spreadsheets.readonly"]
+    )
+    return gspread.authorize(credentials).open_by_key(sheet_id)
+
+
+def iter_chunks(worksheet, start_row=2, chunk_rows=SYNC_CHUNK_ROWS):
+    """Yield (first_row_number, records) for the worksheet, chunk_rows at a time."""
+    headers = [_norm(h) for h in worksheet.row_values(1)]
+    if not headers:
+        return
+    row = start_row
+    while row <= worksheet.row_count:
+        end    = min(row + chunk_rows - 1, worksheet.row_count)
+        values = worksheet.get(f"A{row}:{_column_letter(len(headers))}{end}")
+        if not values:
+            return
+        yield row, [dict(zip(headers, v + [""] * (len(headers) - len(v)))) for v in values]
+        row = end + 1
+
+
+def map_row(table, record):
+    """Sheet record -> income/expense row, or None if it is blank or unparseable."""
+    month  = _parse_month(_pick(record, _MONTH_KEYS))
+    amount = parse_kobo(_pick(record, _AMOUNT_KEYS))
+    label  = _pick(record, _FIELDS[table]["label"])
+    if month is None or amount is None or not label:
+        return None
+    text = _pick(record, _FIELDS[table]["text"])
+    if table == "income":
+        return {"month_year": month, "source": label,
+                "income_type": _pick(record, _FIELDS[table]["type"]) or "Active",
+                "amount_kobo": amount, "notes": text}
+    return {"month_year": month, "category": label, "amount_kobo": amount, "description": text}
+
+
+def content_hash(table, row, occurrence):
+    parts = [table] + [str(row[k]) for k in sorted(row)] + [str(occurrence)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def existing_hashes(table):
+    """All source hashes already synced for the user, paged."""
+    hashes, offset = set(), 0
+    while True:
+        res = get_client().table(table) \
+            .select("source_hash") \
+            .eq("user_id", get_user_id()) \
+            .not_.is_("source_hash", "null") \
+            .range(offset, offset + PAGE_SIZE - 1) \
+            .execute()
+        page = res.data or []
+        hashes.update(r["source_hash"] for r in page)
+        if len(page) < PAGE_SIZE:
+            return hashes
+        offset += PAGE_SIZE
+
+
+def sync_worksheet(worksheet, table, checkpoint_path=None, chunk_rows=SYNC_CHUNK_ROWS):
+    """Sync one worksheet into table; returns counts of inserted/skipped/locked/removed rows."""
+    checkpoint = _load_checkpoint(checkpoint_path)
+    key        = f"{table}:{worksheet.title}"
+    state      = checkpoint.setdefault(key, {"next_row": 2, "seen": {}, "hashes": []})
+    remote     = existing_hashes(table)
+    locked     = locked_months()
+    stats      = {"inserted": 0, "skipped": 0, "locked": 0, "removed": 0}
+    # A checkpoint written before hashes were recorded cannot tell what is stale.
+    hashes     = state.setdefault("hashes", None if state["next_row"] > 2 else [])
+
+    for first_row, records in iter_chunks(worksheet, state["next_row"], chunk_rows):
+        batch = []
+        for record in records:
+            row = map_row(table, record)
+            if row is None:
+                continue
+            base = content_hash(table, row, 0)
+            occurrence = state["seen"].get(base, 0)
+            state["seen"][base] = occurrence + 1
+            row["source_hash"] = base if occurrence == 0 else content_hash(table, row, occurrence)
+            if hashes is not None:
+                hashes.append(row["source_hash"])
+            if row["month_year"] in locked:
+                stats["locked"] += 1
+            elif row["source_hash"] in remote:
+                stats["skipped"] += 1
+            else:
+                batch.append(row)
+        written = insert_rows(table, batch, on_conflict="user_id,source_hash")
+        if written is None:
+            raise RuntimeError(f"Sync of {worksheet.title} stopped at row {first_row}")
+        stats["inserted"] += len(written)
+        stats["skipped"]  += len(batch) - len(written)
+        state["next_row"] = first_row + len(records)
+        _save_checkpoint(checkpoint_path, checkpoint)
+    # Completed: remote hashes the sheet no longer produces are edited or deleted rows.
+    # An empty scan is more likely a broken sheet than an emptied ledger; leave it be.
+    current = set(hashes or ())
+    if current:
+        removed = delete_synced_rows(table, remote - current)
+        if removed is None:
+            raise RuntimeError(f"Sync of {worksheet.title} could not remove superseded rows")
+        stats["removed"] = len(removed)
+    # The checkpoint only exists to resume an interrupted run.
+    checkpoint.pop(key, None)
+    _save_checkpoint(checkpoint_path, checkpoint)
+    return stats
+
+
+# ── HELPERS ─────────────────────────────────────────
+
+def _norm(header):
+    return re.sub(r"[^a-z0-9]+", "_", str(header).strip().lower()).strip("_")
+
+def _pick(record, keys):
+    for k in keys:
+        v = record.get(k)
+        if v not in (None, ""):
+            return str(v).strip()
+    return ""
+
+def _parse_month(value):
+    for fmt in ("%b %Y", "%B %Y", "%Y-%m", "%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%b %Y")
+        except ValueError:
+            continue
+    return None
+
+def _column_letter(n):
+    letters = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+def _load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    return {}
+
+def _save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(checkpoint, fh)
+    os.replace(tmp, path)
@@ -1,124 +1,550 @@
-from supabase import create_client
+import base64
+import json
+import logging
+import threading
+import zlib
+from datetime import datetime
+
+from postgrest import SyncPostgrestClient
 import streamlit as st
 
-SUPABASE_URL = st.secrets["supabase"]["url"]
-SUPABASE_KEY = st.secrets["supabase"]["anon_key"]
+from core.auth import SessionManager, auth_client
+from core.cache import MonthCache, shared_cache
+from core.changefeed import ChangeEvent, get_change_feed
+from core.money import row_kobo, to_kobo
+from core.runtime import get_config, report_error, session_state
+
+log = logging.getLogger("biverway.db")
+
+_client = None
+
+PAGE_SIZE = 1000
+
+
+def base_client():
+    """Shared anonymous client, used for sign-up and password resets.
 
-client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    It never holds a user session: sign-in goes through sign_in(), which
+    gives each session its own client.
+    """
+    global _client
+    if _client is None:
+        _client = auth_client(get_config())
+    return _client
 
 
 def get_client():
-    session = st.session_state.get("supabase_session")
-    if session:
-        client.postgrest.auth(session.access_token)
-    return client
+    """The signed-in session's client, with its token refreshed ahead of expiry.
+
+    Raises RuntimeError when nobody is signed in or the session could not be
+    refreshed; data calls never fall back to the shared anonymous client.
+    """
+    manager = session_state().get("auth_manager")
+    if manager is None:
+        raise RuntimeError("Not signed in")
+    try:
+        return manager.ensure_fresh()
+    except Exception as e:
+        report_error("Your session has expired. Please sign in again.")
+        end_session()
+        raise RuntimeError("Session expired") from e
+
+
+def sign_in(email, password):
+    """Sign in on a fresh per-session client and bind it to this app session.
+
+    Returns the auth response; its session is None when sign-in failed.
+    """
+    client = auth_client(get_config())
+    res    = client.auth.sign_in_with_password({"email": email, "password": password})
+    if res.session:
+        start_session(res.session, client)
+    return res
+
+
+def start_session(session, client=None):
+    """Bind a freshly signed-in auth session to this app session."""
+    end_session()
+    user_id = session.user.id
+    state   = session_state()
+    state["auth_manager"] = SessionManager(
+        get_config(), session,
+        on_refresh=lambda s: get_change_feed().update_token(user_id, s.access_token, s.expires_at),
+        client=client,
+    )
+    state["supabase_session"] = session
+
+
+def end_session():
+    state   = session_state()
+    manager = state.get("auth_manager")
+    if manager is not None:
+        manager.sign_out()
+    state["auth_manager"]     = None
+    state["supabase_session"] = None
+
+
+def current_session():
+    """The live auth session (tracks background refreshes)."""
+    state   = session_state()
+    manager = state.get("auth_manager")
+    return manager.session if manager is not None else state.get("supabase_session")
+
+
+def rest_client(access_token):
+    """A standalone PostgREST client bound to one token, safe to use off the script thread."""
+    config = get_config()
+    return SyncPostgrestClient(
+        f"{config.supabase_url}/rest/v1",
+        headers={"apikey": config.supabase_key, "Authorization": f"Bearer {access_token}"},
+    )
 
 
 def get_user_id():
-    session = st.session_state.get("supabase_session")
+    session = current_session()
     if session:
         return session.user.id
     return None
 
 
+# Process-wide per-user data version. st.cache_data entries are shared by every
+# session in the process, so their version key must be too: a per-session counter
+# restarts at 0 on reload and lets two sessions share a key while holding
+# different data. Bumped by this process's writes and by change-feed events.
+_versions      = {}
+_version_feeds = {}
+_versions_lock = threading.Lock()
+
+
+class _VersionWatcher:
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    def apply_change(self, event):
+        bump_data_version(self.user_id)
+
+
+def bump_data_version(user_id):
+    with _versions_lock:
+        _versions[user_id] = _versions.get(user_id, 0) + 1
+
+def data_version():
+    """Counter bumped on every write or pushed change for the user; lets caches key on "has anything changed"."""
+    user_id = get_user_id()
+    with _versions_lock:
+        if user_id not in _version_feeds:
+            # The feed holds subscribers weakly; keep the watcher alive here.
+            _version_feeds[user_id] = _VersionWatcher(user_id)
+            get_change_feed().subscribe(user_id, _version_feeds[user_id])
+        return _versions.get(user_id, 0)
+
+def month_cache():
+    """The session's cache of loaded months, reset when the signed-in user changes."""
+    user_id = get_user_id()
+    state   = session_state()
+    cache   = state.get("month_cache")
+    if cache is None or cache.owner != user_id:
+        cache = MonthCache(user_id, get_config().month_cache_bytes)
+        state["month_cache"] = cache
+    if user_id:
+        # Every time, not just on creation: this rejoins a dropped channel and
+        # hands the feed this session's token if it outlives the one it holds.
+        session = current_session()
+        get_change_feed().subscribe(user_id, cache, access_token=session.access_token,
+                                    expires_at=session.expires_at)
+    return cache
+
+def _mark_changed(table, month_year=None, event_type=None, rows=()):
+    bump_data_version(get_user_id())
+    month_cache().discard(table, period_key(month_year) if month_year else None)
+    _publish(table, event_type, rows)
+
+def _publish(table, event_type, rows):
+    """Let the user's other sessions patch their caches instead of reloading."""
+    feed    = get_change_feed()
+    user_id = get_user_id()
+    for row in rows or ():
+        if event_type == "DELETE":
+            feed.publish(user_id, ChangeEvent(table, event_type, old_record=row))
+        else:
+            feed.publish(user_id, ChangeEvent(table, event_type, record=row))
+
+def fetch_month(rest, table, user_id, period):
+    return rest.from_(table) \
+        .select("*") \
+        .eq("user_id", user_id) \
+        .eq("period", period) \
+        .execute().data or []
+
+
+def insert_rows(table, rows, on_conflict=None):
+    """Insert many rows in a single request; user_id and period are filled in.
+
+    With on_conflict, rows clashing on those columns are skipped rather than
+    failing the batch. Returns the rows actually written, or None on error.
+    """
+    if not rows:
+        return []
+    user_id = get_user_id()
+    try:
+        locked = _check_unlocked()
+        skipped = sorted({r["month_year"] for r in rows if r["month_year"] in locked})
+        if skipped:
+            log.warning("Skipped %s rows in locked months: %s", table, ", ".join(skipped))
+            rows = [r for r in rows if r["month_year"] not in locked]
+            if not rows:
+                return []
+        payload = [{**r, "user_id": user_id, "period": period_key(r["month_year"])} for r in rows]
+        if on_conflict:
+            res = get_client().table(table).upsert(payload, on_conflict=on_conflict, ignore_duplicates=True).execute()
+        else:
+            res = get_client().table(table).insert(payload).execute()
+        for month_year in {r["month_year"] for r in rows}:
+            _mark_changed(table, month_year)
+        _publish(table, "INSERT", res.data)
+        return res.data or []
+    except Exception as e:
+        report_error(f"Bulk insert error ({table}): {str(e)}")
+        return None
+
+def delete_synced_rows(table, source_hashes, batch=100):
+    """Delete the user's rows carrying these sheet-sync hashes, except in locked months.
+
+    Returns the rows actually deleted, or None on error.
+    """
+    if not source_hashes:
+        return []
+    hashes = sorted(source_hashes)
+    try:
+        locked  = _check_unlocked()
+        deleted = []
+        for i in range(0, len(hashes), batch):
+            q = get_client().table(table).delete() \
+                .eq("user_id", get_user_id()) \
+                .in_("source_hash", hashes[i:i + batch])
+            deleted += _unlocked_only(q, locked).execute().data or []
+        _mark_changed(table, None, "DELETE", deleted)
+        return deleted
+    except Exception as e:
+        report_error(f"Bulk delete error ({table}): {str(e)}")
+        return None
+
+
+# ── PERIODS ─────────────────────────────────────────
+# Tables carry an integer period (YYYYMM) next to the "Mon YYYY" label;
+# it sorts chronologically and is indexed with user_id for range scans.
+
+def period_key(month_year):
+    """Convert a "Jan 2026" label to its 202601 period key."""
+    d = datetime.strptime(month_year, "%b %Y")
+    return d.year * 100 + d.month
+
+def period_label(period):
+    """Convert a 202601 period key back to "Jan 2026"."""
+    return datetime(period // 100, period % 100, 1).strftime("%b %Y")
+
+
+def month_range(start_month, end_month):
+    """All "Mon YYYY" labels from start_month to end_month inclusive."""
+    start = datetime.strptime(start_month, "%b %Y")
+    end   = datetime.strptime(end_month, "%b %Y")
+    if end < start:
+        start, end = end, start
+    months = []
+    y, m = start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        months.append(datetime(y, m, 1).strftime("%b %Y"))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+
+def iter_rows(table, start_month=None, end_month=None, page_size=PAGE_SIZE):
+    """Yield pages of raw rows from income/expense between two months inclusive.
+
+    With both months None, the user's whole history is paged through.
+    """
+    user_id = get_user_id()
+    offset = 0
+    while True:
+        q = get_client().table(table) \
+            .select("*") \
+            .eq("user_id", user_id)
+        if start_month is not None:
+            lo, hi = sorted((period_key(start_month), period_key(end_month)))
+            q = q.gte("period", lo).lte("period", hi)
+        res = q.order("period") \
+            .order("id") \
+            .range(offset, offset + page_size - 1) \
+            .execute()
+        page = res.data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
 # ── INCOME ──────────────────────────────────────────
 
 def add_income(month_year, source, income_type, amount, notes):
     try:
-        get_client().table("income").insert({
+        _check_unlocked(month_year)
+        res = get_client().table("income").insert({
             "user_id":     get_user_id(),
             "month_year":  month_year,
+            "period":      period_key(month_year),
             "source":      source,
             "income_type": income_type,
-            "amount":      float(amount),
+            "amount_kobo": to_kobo(amount),
             "notes":       notes or ""
         }).execute()
+        _mark_changed("income", month_year, "INSERT", res.data)
     except Exception as e:
-        st.error(f"Add income error: {str(e)}")
+        report_error(f"Add income error: {str(e)}")
 
 def load_income(month_year):
+    cache = month_cache()
+    key   = ("income", period_key(month_year))
+    rows  = cache.get(key)
+    if rows is not None:
+        return rows
     try:
         res = get_client().table("income") \
             .select("*") \
-            .eq("month_year", month_year) \
+            .eq("user_id", get_user_id()) \
+            .eq("period", period_key(month_year)) \
             .execute()
-        return res.data or []
+        rows = res.data or []
+        cache.put(key, rows)
+        return rows
     except Exception as e:
-        st.error(f"Load income error: {str(e)}")
+        report_error(f"Load income error: {str(e)}")
         return []
 
 def delete_income(row_id):
     try:
-        get_client().table("income").delete().eq("id", str(row_id)).execute()
+        locked = _check_unlocked()
+        res = _unlocked_only(get_client().table("income").delete().eq("id", str(row_id)), locked).execute()
+        _mark_changed("income", None, "DELETE", res.data)
     except Exception as e:
-        st.error(f"Delete income error: {str(e)}")
+        report_error(f"Delete income error: {str(e)}")
 
 def clear_income_month(month_year):
     try:
-        get_client().table("income").delete().eq("month_year", month_year).execute()
+        _check_unlocked(month_year)
+        res = get_client().table("income").delete() \
+            .eq("user_id", get_user_id()) \
+            .eq("period", period_key(month_year)) \
+            .execute()
+        _mark_changed("income", month_year, "DELETE", res.data)
     except Exception as e:
-        st.error(f"Clear income error: {str(e)}")
+        report_error(f"Clear income error: {str(e)}")
 
 
 # ── EXPENSE ─────────────────────────────────────────
 
 def add_expense(month_year, category, amount, description):
     try:
-        get_client().table("expense").insert({
+        _check_unlocked(month_year)
+        res = get_client().table("expense").insert({
             "user_id":     get_user_id(),
             "month_year":  month_year,
+            "period":      period_key(month_year),
             "category":    category,
-            "amount":      float(amount),
+            "amount_kobo": to_kobo(amount),
             "description": description or ""
         }).execute()
+        _mark_changed("expense", month_year, "INSERT", res.data)
     except Exception as e:
-        st.error(f"Add expense error: {str(e)}")
+        report_error(f"Add expense error: {str(e)}")
 
 def load_expense(month_year):
+    cache = month_cache()
+    key   = ("expense", period_key(month_year))
+    rows  = cache.get(key)
+    if rows is not None:
+        return rows
     try:
         res = get_client().table("expense") \
             .select("*") \
-            .eq("month_year", month_year) \
+            .eq("user_id", get_user_id()) \
+            .eq("period", period_key(month_year)) \
             .execute()
-        return res.data or []
+        rows = res.data or []
+        cache.put(key, rows)
+        return rows
     except Exception as e:
-        st.error(f"Load expense error: {str(e)}")
+        report_error(f"Load expense error: {str(e)}")
         return []
 
 def delete_expense(row_id):
     try:
-        get_client().table("expense").delete().eq("id", str(row_id)).execute()
+        locked = _check_unlocked()
+        res = _unlocked_only(get_client().table("expense").delete().eq("id", str(row_id)), locked).execute()
+        _mark_changed("expense", None, "DELETE", res.data)
     except Exception as e:
-        st.error(f"Delete expense error: {str(e)}")
+        report_error(f"Delete expense error: {str(e)}")
 
 def clear_expense_month(month_year):
     try:
-        get_client().table("expense").delete().eq("month_year", month_year).execute()
+        _check_unlocked(month_year)
+        res = get_client().table("expense").delete() \
+            .eq("user_id", get_user_id()) \
+            .eq("period", period_key(month_year)) \
+            .execute()
+        _mark_changed("expense", month_year, "DELETE", res.data)
     except Exception as e:
-        st.error(f"Clear expense error: {str(e)}")
+        report_error(f"Clear expense error: {str(e)}")
 
 
 # ── LOCK MONTH ───────────────────────────────────────
 
+class MonthLockedError(Exception):
+    pass
+
+def _fetch_locked_months():
+    res = get_client().table("locked_months") \
+        .select("month_year") \
+        .eq("user_id", get_user_id()) \
+        .execute()
+    return {r["month_year"] for r in res.data or []}
+
+def locked_months():
+    """All locked month_year values for the user.
+
+    Cached per session and refetched whenever the change feed reports a lock,
+    so a month locked on another device is frozen here on the next rerun.
+    """
+    user_id = get_user_id()
+    state   = session_state()
+    marker  = month_cache().lock_changes
+    cached  = state.get("locked_months_cache")
+    if cached is None or cached[0] != user_id or cached[1] != marker:
+        try:
+            cached = (user_id, marker, _fetch_locked_months())
+        except Exception as e:
+            # Not cached, so the next call retries: one failed read must not
+            # leave every locked month editable for the rest of the session.
+            report_error(f"Load locked months error: {str(e)}")
+            return set()
+        state["locked_months_cache"] = cached
+    return cached[2]
+
 def is_month_locked(month_year):
-    try:
-        res = get_client().table("locked_months") \
-            .select("*") \
-            .eq("user_id", get_user_id()) \
-            .eq("month_year", month_year) \
-            .execute()
-        return len(res.data) > 0
-    except Exception:
-        return False
+    return month_year in locked_months()
+
+def _check_unlocked(month_year=None):
+    """Re-read the lock set from the database before a write.
+
+    Raises MonthLockedError if month_year is locked; returns the fresh set so
+    writes by row id can exclude locked periods. The session's cached set is
+    updated as a side effect.
+    """
+    locked = _fetch_locked_months()
+    state  = session_state()
+    state["locked_months_cache"] = (get_user_id(), month_cache().lock_changes, locked)
+    if month_year and month_year in locked:
+        raise MonthLockedError(f"{month_year} is locked")
+    return locked
+
+def _unlocked_only(query, locked):
+    """Restrict a delete/update to rows outside locked periods."""
+    if locked:
+        return query.not_.in_("period", sorted(period_key(m) for m in locked))
+    return query
+
+def _fetch_live_month(month_year):
+    """Current income and expense rows for a month, read fresh; raises on failure.
+
+    Snapshots must never be built from load_income/load_expense, which turn a
+    failed read into an empty list that would then be frozen for good.
+    """
+    client, user_id, period = get_client(), get_user_id(), period_key(month_year)
+    return fetch_month(client, "income", user_id, period), fetch_month(client, "expense", user_id, period)
 
 def lock_month(month_year):
     try:
-        get_client().table("locked_months").insert({
-            "user_id":    get_user_id(),
-            "month_year": month_year
+        month_cache().discard("income",  period_key(month_year))
+        month_cache().discard("expense", period_key(month_year))
+        snapshot = _pack_snapshot(*_fetch_live_month(month_year))
+        # Snapshot and lock are written in one transaction (migration 007).
+        get_client().rpc("lock_month_with_snapshot", {
+            "p_month_year": month_year,
+            "p_period":     period_key(month_year),
+            "p_payload":    snapshot
         }).execute()
+        locked_months().add(month_year)
+        _publish("locked_months", "INSERT", [{"user_id": get_user_id(), "month_year": month_year, "period": period_key(month_year)}])
         return True
     except Exception as e:
-        st.error(f"Lock error: {str(e)}")
+        report_error(f"Lock error: {str(e)}")
         return False
-                                             
+
+
+# ── MONTH SNAPSHOTS ──────────────────────────────────
+# A locked month never changes, so its rows and KPIs are frozen into a
+# compressed payload at lock time and served from cache from then on.
+
+def month_kpis(income_records, expense_records):
+    """Month totals in integer kobo (savings_rate is a percentage)."""
+    total_income  = sum(row_kobo(r) for r in income_records)
+    total_expense = sum(row_kobo(r) for r in expense_records)
+    net_surplus   = total_income - total_expense
+    return {
+        "total_income_kobo":   total_income,
+        "total_expense_kobo":  total_expense,
+        "net_surplus_kobo":    net_surplus,
+        "savings_rate":        (net_surplus / total_income * 100) if total_income else 0,
+        "active_income_kobo":  sum(row_kobo(r) for r in income_records if r.get("income_type") == "Active"),
+        "passive_income_kobo": sum(row_kobo(r) for r in income_records if r.get("income_type") == "Passive"),
+    }
+
+def _pack_snapshot(income_records, expense_records):
+    payload = {
+        "income":  income_records,
+        "expense": expense_records,
+        "kpis":    month_kpis(income_records, expense_records),
+    }
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+def _unpack_snapshot(packed):
+    snapshot = json.loads(zlib.decompress(base64.b64decode(packed)).decode("utf-8"))
+    # Snapshots frozen before amounts moved to kobo carry naira-float KPIs.
+    if "total_income_kobo" not in snapshot["kpis"]:
+        snapshot["kpis"] = month_kpis(snapshot["income"], snapshot["expense"])
+    return snapshot
+
+@shared_cache
+@st.cache_data(show_spinner=False, max_entries=240)
+def _cached_snapshot(user_id, month_year):
+    res = get_client().table("month_snapshots") \
+        .select("payload") \
+        .eq("user_id", user_id) \
+        .eq("period", period_key(month_year)) \
+        .limit(1) \
+        .execute()
+    if res.data:
+        return _unpack_snapshot(res.data[0]["payload"])
+    # Months locked before snapshots existed are frozen on first view.
+    packed = _pack_snapshot(*_fetch_live_month(month_year))
+    get_client().table("month_snapshots").insert({
+        "user_id":    user_id,
+        "month_year": month_year,
+        "period":     period_key(month_year),
+        "payload":    packed
+    }).execute()
+    return _unpack_snapshot(packed)
+
+def load_month_snapshot(month_year):
+    try:
+        return _cached_snapshot(get_user_id(), month_year)
+    except Exception as e:
+        report_error(f"Load snapshot error: {str(e)}")
+        income_records  = load_income(month_year)
+        expense_records = load_expense(month_year)
+        return {
+            "income":  income_records,
+            "expense": expense_records,
+            "kpis":    month_kpis(income_records, expense_records),
+        }
@@ -0,0 +1,220 @@
+"""Concurrent-session load test for app.py.
+
+Each simulated user drives its own headless Streamlit session (AppTest)
+in its own process against the auth/PostgREST stand-in: sign in, then
+loop over switching months, adding, editing and deleting income. Every
+step is one script rerun, timed individually, and both uncaught
+exceptions and st.error messages count as errors. For each concurrency
+level the run reports reruns/sec, rerun latency percentiles, CPU use
+summed over the user processes, resident memory growth per session, and
+the per-session bytes core.memory accounts for.
+
+AppTest swaps process-global state (the Runtime instance, st.secrets) on
+every run, so sessions cannot share a process. As a result the shared
+st.cache_data entries are per process here, unlike a real server. The
+stand-in also runs in its own process, so CPU and memory cover the app
+sessions only.
+
+    python -m loadtest.run --users 1,5,10,25 --steps 40
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from core.memory import total_bytes
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / "app.py")
+MONTHS   = ["January", "February", "March", "April", "May", "June",
+            "July", "August", "September", "October", "November", "December"]
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is a high-water mark (KiB on Linux, bytes on macOS); good enough as a fallback.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+def _labelled(widgets, label, form=None):
+    return next(w for w in widgets if w.label == label and (form is None or w.form_id == form))
+
+
+def start_standin():
+    """Run the stand-in in a child process; returns (process, base_url)."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "loadtest.standin", "--port", "0"],
+        stdout=subprocess.PIPE, text=True,
+        cwd=str(Path(__file__).resolve().parent.parent),
+    )
+    line = proc.stdout.readline()
+    if "listening on " not in line:
+        proc.kill()
+        raise SystemExit(f"Stand-in failed to start: {line.strip() or 'no output'}")
+    return proc, line.split("listening on ", 1)[1].split()[0]
+
+
+class SimulatedUser:
+    def __init__(self, n, url, timeout):
+        self.email     = f"loadtest-{n}@example.com"
+        self.rng       = random.Random(n)
+        self.latencies = []
+        self.errors    = []
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.secrets["supabase"] = {"url": url, "anon_key": "loadtest"}
+        self.at.secrets["app"]      = {"change_feed": "local"}
+
+    def _run(self, step):
+        start = time.perf_counter()
+        try:
+            step()
+            self.at.run()
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+            return
+        self.latencies.append(time.perf_counter() - start)
+        self.errors.extend(e.value for e in self.at.exception)
+        self.errors.extend(e.value for e in self.at.error)
+
+    def sign_in(self):
+        self._run(lambda: None)
+        def fill():
+            _labelled(self.at.text_input, "Email").input(self.email)
+            _labelled(self.at.text_input, "Password").input("loadtest-password")
+            _button(self.at, "Sign In").click()
+        self._run(fill)
+
+    def switch_month(self):
+        self._run(lambda: self.at.selectbox(key="month_select").select(self.rng.choice(MONTHS)))
+
+    def add_income(self):
+        def fill():
+            _labelled(self.at.number_input, "Amount").set_value(float(self.rng.randrange(1, 500)) * 1000)
+            _button(self.at, "Record Income").click()
+        self._run(fill)
+
+    def edit_income(self):
+        if not self._has("edit_inc_btn"):
+            return self.add_income()
+        self._run(lambda: self.at.button(key="edit_inc_btn").click())
+        def save():
+            _labelled(self.at.number_input, "Amount", form="edit_income_form").set_value(float(self.rng.randrange(1, 500)) * 1000)
+            _button(self.at, "Save Changes").click()
+        self._run(save)
+
+    def delete_income(self):
+        if not self._has("del_inc_btn"):
+            return self.add_income()
+        self._run(lambda: self.at.button(key="del_inc_btn").click())
+        self._run(lambda: self.at.button(key="confirm_inc_yes").click())
+
+    def _has(self, key):
+        return any(b.key == key for b in self.at.button)
+
+    def play(self, steps):
+        self.sign_in()
+        actions = [self.switch_month, self.add_income, self.add_income, self.edit_income, self.delete_income]
+        for _ in range(steps):
+            self.rng.choice(actions)()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _play_in_process(n, url, timeout, steps, barrier, results):
+    """One simulated user in its own process; reports its measurements on results."""
+    try:
+        sim = SimulatedUser(n, url, timeout)
+        rss_before, tracked_before = rss_bytes(), total_bytes()
+        barrier.wait()      # start together, after the slow imports
+        cpu_start, started = time.process_time(), time.time()
+        sim.play(steps)
+        results.put({
+            "latencies": sim.latencies,
+            "errors":    sim.errors,
+            "cpu":       time.process_time() - cpu_start,
+            "started":   started,
+            "finished":  time.time(),
+            "rss":       max(rss_bytes() - rss_before, 0),
+            "tracked":   max(total_bytes() - tracked_before, 0),
+        })
+    except Exception as e:
+        barrier.abort()
+        results.put({"errors": [f"user {n} failed: {type(e).__name__}: {e}"]})
+
+
+def run_level(users, steps, url, timeout):
+    ctx     = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(users)
+    results = ctx.Queue()
+    procs   = [ctx.Process(target=_play_in_process, args=(i, url, timeout, steps, barrier, results), name=f"user-{i}")
+               for i in range(users)]
+    for p in procs:
+        p.start()
+    reports = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    done      = [r for r in reports if "latencies" in r]
+    wall      = (max(r["finished"] for r in done) - min(r["started"] for r in done)) if done else 0.0
+    latencies = [x for r in done for x in r["latencies"]]
+    errors    = [x for r in reports for x in r["errors"]]
+    return {
+        "users":        users,
+        "reruns":       len(latencies),
+        "reruns_per_s": len(latencies) / wall if wall else 0.0,
+        "p50_ms":       percentile(latencies, 50) * 1000,
+        "p95_ms":       percentile(latencies, 95) * 1000,
+        "p99_ms":       percentile(latencies, 99) * 1000,
+        "mean_ms":      statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "cpu_pct":      100 * sum(r["cpu"] for r in done) / wall if wall else 0.0,
+        "mb_per_user":  sum(r["rss"] for r in done) / max(len(done), 1) / 2**20,
+        "kb_tracked":   sum(r["tracked"] for r in done) / max(len(done), 1) / 1024,
+        "errors":       errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users",   default="1,5,10", help="comma-separated concurrency levels")
+    parser.add_argument("--steps",   type=int, default=30, help="actions per user after sign-in")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds allowed per rerun")
+    parser.add_argument("--url",     help="use a running stand-in instead of starting one")
+    args = parser.parse_args(argv)
+
+    standin, url = (None, args.url) if args.url else start_standin()
+    header = f"{'users':>5} {'reruns':>7} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cpu %':>6} {'MB/user':>8} {'KB held':>8} {'errors':>6}"
+    print(header)
+    print("-" * len(header))
+    failed = False
+    for users in (int(u) for u in args.users.split(",")):
+        r = run_level(users, args.steps, url, args.timeout)
+        print(f"{r['users']:>5} {r['reruns']:>7} {r['reruns_per_s']:>9.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+              f" {r['p99_ms']:>8.1f} {r['cpu_pct']:>6.0f} {r['mb_per_user']:>8.2f} {r['kb_tracked']:>8.1f} {len(r['errors']):>6}")
+        for e in sorted(set(r["errors"]))[:5]:
+            print(f"      ! {e}")
+        failed = failed or bool(r["errors"])
+    if standin:
+        standin.terminate()
+        standin.wait()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,356 @@
+"""In-memory stand-in for the Supabase auth (GoTrue) and PostgREST endpoints.
+
+Implements just enough of both wire protocols for app.py and core/ to run
+unmodified against it: password/refresh-token sign-in, and table reads,
+inserts, upserts, updates and deletes with the eq/gte/lte/in/is/fts filters,
+ordering and offset/limit paging the data layer uses. Every request is
+scoped to the bearer token's user, standing in for row level security.
+
+    python -m loadtest.standin --port 54321
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+TOKEN_TTL = 3600
+
+# Columns each table derives server-side, mirroring the migrations.
+_GENERATED = {
+    "income":              lambda r: {"amount": r.get("amount_kobo", 0) / 100},
+    "expense":             lambda r: {"amount": r.get("amount_kobo", 0) / 100},
+    "recurring_templates": lambda r: {"amount": r.get("amount_kobo", 0) / 100, "active": r.get("active", True)},
+}
+_UNIQUE = {
+    "income":          [("template_id", "period"), ("user_id", "source_hash")],
+    "expense":         [("template_id", "period"), ("user_id", "source_hash")],
+    "locked_months":   [("user_id", "month_year")],
+    "month_snapshots": [("user_id", "month_year")],
+}
+
+
+class Store:
+    def __init__(self):
+        self.tables = {}
+        self.users  = {}    # email -> user dict
+        self.tokens = {}    # access token -> user id
+        self.refresh = {}   # refresh token -> user id
+        self.lock   = threading.Lock()
+        self.requests = deque(maxlen=200)   # recent (method, path) pairs, for tests
+
+    # ── auth ──
+    def sign_in(self, email):
+        with self.lock:
+            user = self.users.get(email)
+            if user is None:
+                user = {
+                    "id": str(uuid.uuid4()), "aud": "authenticated", "role": "authenticated",
+                    "email": email, "app_metadata": {"provider": "email"}, "user_metadata": {},
+                    "identities": [], "created_at": _now_iso(),
+                }
+                self.users[email] = user
+            return self._issue(user)
+
+    def refresh_session(self, refresh_token):
+        with self.lock:
+            user_id = self.refresh.pop(refresh_token, None)
+            if user_id is None:
+                return None
+            user = next(u for u in self.users.values() if u["id"] == user_id)
+            return self._issue(user)
+
+    def _issue(self, user):
+        access, refresh = uuid.uuid4().hex, uuid.uuid4().hex
+        self.tokens[access]   = user["id"]
+        self.refresh[refresh] = user["id"]
+        return {
+            "access_token": access, "refresh_token": refresh, "token_type": "bearer",
+            "expires_in": TOKEN_TTL, "expires_at": int(time.time()) + TOKEN_TTL, "user": user,
+        }
+
+    # ── tables ──
+    def rows(self, table):
+        if table == "ledger_entries":
+            return self._ledger_entries()
+        return self.tables.setdefault(table, [])
+
+    def _ledger_entries(self):
+        out = []
+        for r in self.tables.get("income", []):
+            out.append({**r, "kind": "income", "category": r.get("source"), "notes": r.get("notes"),
+                        "search_tsv": f'{r.get("source", "")} {r.get("notes", "")}'.lower()})
+        for r in self.tables.get("expense", []):
+            out.append({**r, "kind": "expense", "income_type": None, "notes": r.get("description"),
+                        "search_tsv": f'{r.get("category", "")} {r.get("description", "")}'.lower()})
+        return out
+
+    def insert(self, table, records, user_id, on_conflict=None, ignore_duplicates=False):
+        written = []
+        with self.lock:
+            rows = self.rows(table)
+            for rec in records:
+                row = {"id": str(uuid.uuid4()), "created_at": _now_iso(), **rec}
+                row.setdefault("user_id", user_id)
+                row.update(_GENERATED.get(table, lambda r: {})(row))
+                clash = self._clash(table, rows, row, on_conflict)
+                if clash is not None:
+                    if ignore_duplicates or on_conflict:
+                        continue
+                    raise Conflict(f"duplicate key value violates unique constraint on {table}")
+                rows.append(row)
+                written.append(row)
+        return written
+
+    def _clash(self, table, rows, row, on_conflict):
+        keys = [tuple(on_conflict.split(","))] if on_conflict else _UNIQUE.get(table, [])
+        for cols in keys:
+            values = tuple(row.get(c) for c in cols)
+            if None in values:
+                continue
+            for r in rows:
+                if tuple(r.get(c) for c in cols) == values:
+                    return r
+        return None
+
+    def lock_month(self, user_id, args):
+        """lock_month_with_snapshot(): upsert the snapshot and add the lock atomically."""
+        with self.lock:
+            snaps = self.rows("month_snapshots")
+            snap  = next((r for r in snaps if r["user_id"] == user_id and r["month_year"] == args["p_month_year"]), None)
+            if snap is None:
+                snaps.append({"id": str(uuid.uuid4()), "created_at": _now_iso(), "user_id": user_id,
+                              "month_year": args["p_month_year"], "period": args["p_period"], "payload": args["p_payload"]})
+            else:
+                snap.update(period=args["p_period"], payload=args["p_payload"])
+            locks = self.rows("locked_months")
+            if not any(r["user_id"] == user_id and r["month_year"] == args["p_month_year"] for r in locks):
+                locks.append({"id": str(uuid.uuid4()), "user_id": user_id,
+                              "month_year": args["p_month_year"], "period": args["p_period"]})
+
+    def update(self, table, filters, patch):
+        with self.lock:
+            hit = [r for r in self.rows(table) if _matches(r, filters)]
+            for r in hit:
+                r.update(patch)
+                r.update(_GENERATED.get(table, lambda r: {})(r))
+            return hit
+
+    def delete(self, table, filters):
+        with self.lock:
+            rows = self.rows(table)
+            hit  = [r for r in rows if _matches(r, filters)]
+            self.tables[table] = [r for r in rows if not _matches(r, filters)]
+            return hit
+
+
+class Conflict(Exception):
+    pass
+
+
+# ── filters ──────────────────────────────────────────
+
+_RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+def _parse_filters(query):
+    filters = []
+    for key, value in query:
+        if key in _RESERVED:
+            continue
+        negate = value.startswith("not.")
+        if negate:
+            value = value[4:]
+        op, _, arg = value.partition(".")
+        filters.append((key, op.split("(", 1)[0], arg, negate))    # fts(simple) -> fts
+    return filters
+
+def _coerce(value, sample):
+    if isinstance(sample, bool):
+        return value == "true"
+    if isinstance(sample, int):
+        return int(value)
+    if isinstance(sample, float):
+        return float(value)
+    return value
+
+def _matches(row, filters):
+    for col, op, arg, negate in filters:
+        v = row.get(col)
+        if op == "eq":
+            ok = v is not None and v == _coerce(arg, v)
+        elif op == "neq":
+            ok = v is None or v != _coerce(arg, v)
+        elif op in ("gt", "gte", "lt", "lte"):
+            if v is None:
+                ok = False
+            else:
+                a = _coerce(arg, v)
+                ok = {"gt": v > a, "gte": v >= a, "lt": v < a, "lte": v <= a}[op]
+        elif op == "in":
+            items = [i.strip().strip('"') for i in arg.strip("()").split(",")]
+            ok = v is not None and str(v) in items
+        elif op == "is":
+            ok = (v is None) if arg == "null" else (v is (arg == "true"))
+        elif op.endswith("fts"):
+            terms = re.findall(r"\w+", arg.lower())
+            ok = all(t in str(v or "") for t in terms)
+        else:
+            ok = True
+        if ok == negate:
+            return False
+    return True
+
+def _order(rows, spec):
+    for part in reversed([p for p in spec.split(",") if p]):
+        col, *mods = part.split(".")
+        desc = "desc" in mods
+        rows.sort(key=lambda r: (r.get(col) is None, r.get(col) if r.get(col) is not None else 0), reverse=desc)
+    return rows
+
+def _project(rows, select):
+    if not select or select == "*":
+        return [dict(r) for r in rows]
+    cols = [c.strip() for c in select.split(",")]
+    return [{c: r.get(c) for c in cols} for r in rows]
+
+
+# ── HTTP ────────────────────────────────────────────
+
+class Handler(BaseHTTPRequestHandler):
+    store = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _user_id(self):
+        auth = self.headers.get("Authorization", "")
+        return self.store.tokens.get(auth.removeprefix("Bearer ").strip())
+
+    def _route(self):
+        self.store.requests.append((self.command, self.path))
+        parts = urlsplit(self.path)
+        return parts.path.rstrip("/"), parse_qsl(parts.query, keep_blank_values=True)
+
+    def do_POST(self):
+        path, query = self._route()
+        body = self._body()
+        if path == "/auth/v1/token":
+            grant = dict(query).get("grant_type")
+            if grant == "password":
+                return self._send(200, self.store.sign_in(body["email"]))
+            if grant == "refresh_token":
+                session = self.store.refresh_session(body.get("refresh_token"))
+                return self._send(200, session) if session else self._send(400, {"error": "invalid_grant"})
+        if path == "/auth/v1/signup":
+            return self._send(200, self.store.sign_in(body["email"])["user"])
+        if path in ("/auth/v1/logout", "/auth/v1/recover"):
+            return self._send(204)
+        if path.startswith("/rest/v1/"):
+            user_id = self._user_id()
+            if user_id is None:
+                return self._send(401, {"message": "JWT required"})
+            if path == "/rest/v1/rpc/lock_month_with_snapshot":
+                self.store.lock_month(user_id, body)
+                return self._send(200, None)
+            params  = dict(query)
+            prefer  = self.headers.get("Prefer", "")
+            records = body if isinstance(body, list) else [body]
+            try:
+                written = self.store.insert(
+                    path.removeprefix("/rest/v1/"), records, user_id,
+                    on_conflict=params.get("on_conflict") if "resolution=" in prefer else None,
+                    ignore_duplicates="resolution=ignore-duplicates" in prefer,
+                )
+            except Conflict as e:
+                return self._send(409, {"code": "23505", "message": str(e)})
+            return self._send(201, written if "return=representation" in prefer else None)
+        self._send(404, {"message": f"no route {path}"})
+
+    def do_GET(self):
+        path, query = self._route()
+        if path == "/auth/v1/user":
+            user_id = self._user_id()
+            user = next((u for u in self.store.users.values() if u["id"] == user_id), None)
+            return self._send(200, user) if user else self._send(401, {"message": "invalid token"})
+        if not path.startswith("/rest/v1/"):
+            return self._send(404, {"message": f"no route {path}"})
+        user_id = self._user_id()
+        if user_id is None:
+            return self._send(401, {"message": "JWT required"})
+        params  = dict(query)
+        filters = _parse_filters(query) + [("user_id", "eq", user_id, False)]
+        with self.store.lock:
+            rows = [r for r in self.store.rows(path.removeprefix("/rest/v1/")) if _matches(r, filters)]
+        rows = _order(rows, params.get("order", ""))
+        offset, limit = int(params.get("offset", 0)), params.get("limit")
+        rng = self.headers.get("Range")
+        if rng and "-" in rng:
+            lo, hi = rng.split("-")
+            offset, limit = int(lo), int(hi) - int(lo) + 1
+        rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+        self._send(200, _project(rows, params.get("select")))
+
+    def do_PATCH(self):
+        path, query = self._route()
+        body    = self._body()
+        user_id = self._user_id()
+        if user_id is None:
+            return self._send(401, {"message": "JWT required"})
+        filters = _parse_filters(query) + [("user_id", "eq", user_id, False)]
+        rows = self.store.update(path.removeprefix("/rest/v1/"), filters, body or {})
+        self._send(200, rows if "return=representation" in self.headers.get("Prefer", "") else None)
+
+    def do_DELETE(self):
+        path, query = self._route()
+        self._body()    # postgrest-py sends {}; unread, it would prefix the next request on this connection
+        user_id = self._user_id()
+        if user_id is None:
+            return self._send(401, {"message": "JWT required"})
+        filters = _parse_filters(query) + [("user_id", "eq", user_id, False)]
+        rows = self.store.delete(path.removeprefix("/rest/v1/"), filters)
+        self._send(200, rows if "return=representation" in self.headers.get("Prefer", "") else None)
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def serve(port=0):
+    """Start the stand-in on a background thread; returns (server, base_url)."""
+    handler = type("StandinHandler", (Handler,), {"store": Store()})
+    server  = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="standin", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=54321)
+    args = parser.parse_args()
+    server, url = serve(args.port)
+    print(f"Stand-in listening on {url}  (anon key: any string)", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
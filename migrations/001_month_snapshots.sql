@@ -0,0 +1,19 @@
+-- Frozen, compressed copy of a locked month's rows and KPIs.
+-- Written once by lock_month(); rows are never updated or deleted.
+
+create table if not exists month_snapshots (
+    id          uuid primary key default gen_random_uuid(),
+    user_id     uuid not null references auth.users (id) on delete cascade,
+    month_year  text not null,
+    payload     text not null,
+    created_at  timestamptz not null default now(),
+    unique (user_id, month_year)
+);
+
+alter table month_snapshots enable row level security;
+
+create policy "snapshots_select_own" on month_snapshots
+    for select using (auth.uid() = user_id);
+
+create policy "snapshots_insert_own" on month_snapshots
+    for insert with check (auth.uid() = user_id);
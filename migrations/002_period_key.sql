@@ -0,0 +1,22 @@
+-- Integer period key (YYYYMM) alongside the "Mon YYYY" month_year label.
+-- Sorts chronologically and supports range scans; indexed with user_id.
+
+alter table income          add column if not exists period integer;
+alter table expense         add column if not exists period integer;
+alter table locked_months   add column if not exists period integer;
+alter table month_snapshots add column if not exists period integer;
+
+update income          set period = to_char(to_date(month_year, 'Mon YYYY'), 'YYYYMM')::integer where period is null;
+update expense         set period = to_char(to_date(month_year, 'Mon YYYY'), 'YYYYMM')::integer where period is null;
+update locked_months   set period = to_char(to_date(month_year, 'Mon YYYY'), 'YYYYMM')::integer where period is null;
+update month_snapshots set period = to_char(to_date(month_year, 'Mon YYYY'), 'YYYYMM')::integer where period is null;
+
+alter table income          alter column period set not null;
+alter table expense         alter column period set not null;
+alter table locked_months   alter column period set not null;
+alter table month_snapshots alter column period set not null;
+
+create index if not exists income_user_period_idx          on income          (user_id, period);
+create index if not exists expense_user_period_idx         on expense         (user_id, period);
+create index if not exists locked_months_user_period_idx   on locked_months   (user_id, period);
+create index if not exists month_snapshots_user_period_idx on month_snapshots (user_id, period);
@@ -0,0 +1,20 @@
+-- Full-text search over income notes/sources and expense descriptions/categories.
+-- ledger_entries unions both tables so search can paginate across them in one query;
+-- security_invoker keeps the tables' row level security in force.
+
+alter table income add column if not exists search_tsv tsvector
+    generated always as (to_tsvector('simple', coalesce(source, '') || ' ' || coalesce(notes, ''))) stored;
+alter table expense add column if not exists search_tsv tsvector
+    generated always as (to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(description, ''))) stored;
+
+create index if not exists income_search_idx  on income  using gin (search_tsv);
+create index if not exists expense_search_idx on expense using gin (search_tsv);
+
+create or replace view ledger_entries with (security_invoker = true) as
+    select id, user_id, 'income'::text as kind, month_year, period,
+           source as category, income_type, amount, notes, search_tsv
+      from income
+    union all
+    select id, user_id, 'expense'::text as kind, month_year, period,
+           category, null::text as income_type, amount, description as notes, search_tsv
+      from expense;
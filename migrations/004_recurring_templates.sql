@@ -0,0 +1,30 @@
+-- Recurring entries (salary, rent, subscriptions...) materialised once per month.
+-- (template_id, period) is unique on income/expense, so generating a month twice
+-- is a no-op; manual entries have a null template_id and never conflict.
+
+create table if not exists recurring_templates (
+    id            uuid primary key default gen_random_uuid(),
+    user_id       uuid not null references auth.users (id) on delete cascade,
+    kind          text not null check (kind in ('income', 'expense')),
+    label         text not null,
+    income_type   text,
+    amount        numeric not null,
+    notes         text not null default '',
+    start_period  integer not null,
+    end_period    integer,
+    active        boolean not null default true,
+    created_at    timestamptz not null default now()
+);
+
+create index if not exists recurring_templates_user_idx on recurring_templates (user_id, active);
+
+alter table recurring_templates enable row level security;
+
+create policy "templates_all_own" on recurring_templates
+    for all using (auth.uid() = user_id) with check (auth.uid() = user_id);
+
+alter table income  add column if not exists template_id uuid references recurring_templates (id) on delete set null;
+alter table expense add column if not exists template_id uuid references recurring_templates (id) on delete set null;
+
+alter table income  add constraint income_template_period_key  unique (template_id, period);
+alter table expense add constraint expense_template_period_key unique (template_id, period);
@@ -0,0 +1,8 @@
+-- Content hash of rows migrated from the legacy Google Sheet, so re-running the
+-- sync only transfers rows that are not in Supabase yet.
+
+alter table income  add column if not exists source_hash text;
+alter table expense add column if not exists source_hash text;
+
+alter table income  add constraint income_user_source_hash_key  unique (user_id, source_hash);
+alter table expense add constraint expense_user_source_hash_key unique (user_id, source_hash);
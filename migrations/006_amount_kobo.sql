@@ -0,0 +1,33 @@
+-- Store money as integer kobo. amount_kobo becomes the source of truth;
+-- amount is kept as a read-only generated naira column for older readers.
+
+drop view if exists ledger_entries;
+
+alter table income              add column if not exists amount_kobo bigint;
+alter table expense             add column if not exists amount_kobo bigint;
+alter table recurring_templates add column if not exists amount_kobo bigint;
+
+update income              set amount_kobo = round(amount * 100) where amount_kobo is null;
+update expense             set amount_kobo = round(amount * 100) where amount_kobo is null;
+update recurring_templates set amount_kobo = round(amount * 100) where amount_kobo is null;
+
+alter table income              alter column amount_kobo set not null;
+alter table expense             alter column amount_kobo set not null;
+alter table recurring_templates alter column amount_kobo set not null;
+
+alter table income              drop column amount;
+alter table expense             drop column amount;
+alter table recurring_templates drop column amount;
+
+alter table income              add column amount numeric generated always as (amount_kobo / 100.0) stored;
+alter table expense             add column amount numeric generated always as (amount_kobo / 100.0) stored;
+alter table recurring_templates add column amount numeric generated always as (amount_kobo / 100.0) stored;
+
+create or replace view ledger_entries with (security_invoker = true) as
+    select id, user_id, 'income'::text as kind, month_year, period,
+           source as category, income_type, amount_kobo, notes, search_tsv
+      from income
+    union all
+    select id, user_id, 'expense'::text as kind, month_year, period,
+           category, null::text as income_type, amount_kobo, description as notes, search_tsv
+      from expense;
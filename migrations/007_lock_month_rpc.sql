@@ -0,0 +1,38 @@
+-- Lock a month and freeze its snapshot in one transaction.
+-- Previously the snapshot and the lock were two requests: if the second
+-- failed, the snapshot row blocked every retry on unique (user_id, month_year).
+-- A snapshot whose month was never locked can now be overwritten; once the
+-- lock exists the update policy no longer matches and the snapshot is frozen.
+
+create policy "snapshots_update_unlocked" on month_snapshots
+    for update
+    using (
+        auth.uid() = user_id
+        and not exists (
+            select 1 from locked_months l
+            where l.user_id = month_snapshots.user_id and l.month_year = month_snapshots.month_year
+        )
+    )
+    with check (auth.uid() = user_id);
+
+create or replace function lock_month_with_snapshot(p_month_year text, p_period integer, p_payload text)
+returns void
+language plpgsql
+security invoker
+as $$
+begin
+    insert into month_snapshots (user_id, month_year, period, payload)
+    values (auth.uid(), p_month_year, p_period, p_payload)
+    on conflict (user_id, month_year) do update
+        set payload = excluded.payload, period = excluded.period, created_at = now();
+
+    if not exists (
+        select 1 from locked_months where user_id = auth.uid() and month_year = p_month_year
+    ) then
+        insert into locked_months (user_id, month_year, period)
+        values (auth.uid(), p_month_year, p_period);
+    end if;
+end;
+$$;
+
+grant execute on function lock_month_with_snapshot(text, integer, text) to authenticated;
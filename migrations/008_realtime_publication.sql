@@ -0,0 +1,23 @@
+-- Publish ledger and lock changes to Supabase Realtime. Without this the
+-- postgres_changes channels opened by SupabaseChangeFeed never fire.
+-- replica identity full makes UPDATE/DELETE events carry the old row
+-- (id and period) that MonthCache.apply_change() uses.
+
+alter table income        replica identity full;
+alter table expense       replica identity full;
+alter table locked_months replica identity full;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['income', 'expense', 'locked_months'] loop
+        if not exists (
+            select 1 from pg_publication_tables
+            where pubname = 'supabase_realtime' and schemaname = 'public' and tablename = t
+        ) then
+            execute format('alter publication supabase_realtime add table public.%I', t);
+        end if;
+    end loop;
+end;
+$$;
@@ -0,0 +1,33 @@
+"""Shared fixtures. Data-layer tests run against loadtest.standin in-process.
+
+    python -m pytest tests
+"""
+import uuid
+
+import pytest
+
+from core.runtime import Config, configure
+from loadtest.standin import serve
+
+
+@pytest.fixture(scope="session")
+def standin():
+    server, url = serve()
+    server.url = url
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def standin_url(standin):
+    return standin.url
+
+
+@pytest.fixture
+def signed_in(standin_url):
+    """A headless session signed in as a fresh user on the stand-in."""
+    from core.supabase_db import end_session, sign_in
+    session = configure(Config(standin_url, "test", change_feed="local"))
+    sign_in(f"test-{uuid.uuid4().hex[:8]}@example.com", "password")
+    yield session
+    end_session()
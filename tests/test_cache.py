@@ -0,0 +1,81 @@
+from core.cache import MonthCache, estimate_bytes
+from core.changefeed import ChangeEvent
+
+JAN, FEB = ("income", 202601), ("income", 202602)
+
+
+def _row(id, period=202601, kobo=100):
+    return {"id": id, "period": period, "amount_kobo": kobo}
+
+
+def test_lru_stays_within_its_byte_budget():
+    rows  = [_row(1)]
+    cache = MonthCache("u1", estimate_bytes(rows) * 2)
+    cache.put(JAN, rows)
+    cache.put(FEB, rows)
+    cache.get(JAN)                              # JAN is now most recent
+    cache.put(("income", 202603), rows)
+    assert JAN in cache and FEB not in cache
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_insert_update_delete_patch_cached_months_in_place():
+    cache = MonthCache("u1", 10_000)
+    cache.put(JAN, [_row(1)])
+    cache.put(FEB, [])
+    cache.apply_change(ChangeEvent("income", "INSERT", record=_row(2)))
+    cache.apply_change(ChangeEvent("income", "UPDATE", record=_row(1, 202602, 500), old_record=_row(1)))
+    assert cache.get(JAN) == [_row(2)]
+    assert cache.get(FEB) == [_row(1, 202602, 500)]
+    cache.apply_change(ChangeEvent("income", "DELETE", old_record=_row(2)))
+    assert cache.get(JAN) == []
+    assert cache.bytes == estimate_bytes([]) + estimate_bytes([_row(1, 202602, 500)])
+    assert cache.changes == 3
+
+
+def test_changes_to_uncached_months_are_ignored():
+    cache = MonthCache("u1", 10_000)
+    cache.apply_change(ChangeEvent("income", "INSERT", record=_row(1)))
+    assert JAN not in cache and cache.changes == 0
+
+
+def test_lock_event_drops_the_month_and_flags_the_lock_set():
+    cache = MonthCache("u1", 10_000)
+    cache.put(JAN, [_row(1)])
+    cache.put(("expense", 202601), [])
+    cache.apply_change(ChangeEvent("locked_months", "INSERT", record={"month_year": "Jan 2026", "period": 202601}))
+    assert JAN not in cache and ("expense", 202601) not in cache
+    assert cache.lock_changes == 1
+
+
+def test_claim_is_exclusive_and_released():
+    cache = MonthCache("u1", 10_000)
+    claim = cache.claim(JAN)
+    assert claim is not None and cache.claim(JAN) is None
+    cache.release(JAN, claim)
+    assert cache.claim(JAN) is not None
+    cache.put(FEB, [])
+    assert cache.claim(FEB) is None             # already cached
+
+
+def test_invalidation_cancels_an_in_flight_fetch():
+    cache = MonthCache("u1", 10_000)
+    claim = cache.claim(JAN)
+    cache.apply_change(ChangeEvent("income", "INSERT", record=_row(2)))
+    cache.put(JAN, [_row(1)], claim=claim)      # fetched before the insert: dropped
+    assert JAN not in cache
+    claim = cache.claim(JAN)
+    cache.discard("income", 202601)
+    cache.put(JAN, [_row(1)], claim=claim)
+    assert JAN not in cache
+    claim = cache.claim(JAN)
+    cache.put(JAN, [_row(1), _row(2)], claim=claim)
+    assert cache.get(JAN) == [_row(1), _row(2)]
+
+
+def test_direct_put_wins_over_a_later_stale_prefetch():
+    cache = MonthCache("u1", 10_000)
+    claim = cache.claim(JAN)
+    cache.put(JAN, [_row(1), _row(2)])          # the script thread loaded it itself
+    cache.put(JAN, [_row(1)], claim=claim)
+    assert cache.get(JAN) == [_row(1), _row(2)]
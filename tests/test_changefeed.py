@@ -0,0 +1,111 @@
+import asyncio
+import gc
+import uuid
+
+from core.cache import MonthCache
+from core.changefeed import ChangeEvent, LocalChangeFeed, SupabaseChangeFeed
+from core.runtime import Config, Session, configure
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def apply_change(self, event):
+        self.events.append(event)
+
+
+class FakeRealtime:
+    def __init__(self):
+        self.tokens  = []
+        self.removed = []
+
+    async def set_auth(self, token):
+        self.tokens.append(token)
+
+    async def remove_channel(self, channel):
+        self.removed.append(channel)
+
+
+class FakeClient:
+    def __init__(self):
+        self.realtime = FakeRealtime()
+
+
+class FakeChannel:
+    is_closed  = False
+    is_errored = False
+
+
+def test_local_feed_delivers_to_every_session_of_the_user():
+    feed = LocalChangeFeed()
+    laptop, phone, other = Recorder(), Recorder(), Recorder()
+    feed.subscribe("u1", laptop)
+    feed.subscribe("u1", phone)
+    feed.subscribe("u2", other)
+    feed.publish("u1", ChangeEvent("income", "INSERT", record={"id": 1}))
+    assert len(laptop.events) == len(phone.events) == 1
+    assert other.events == []
+
+
+def test_local_feed_forgets_discarded_sessions():
+    feed = LocalChangeFeed()
+    feed.subscribe("u1", Recorder())
+    gc.collect()
+    assert not list(feed._subscribers["u1"])
+
+
+def test_write_in_one_session_patches_another_sessions_cache(standin_url):
+    from core.supabase_db import add_income, end_session, load_income, month_cache, sign_in
+    config = Config(standin_url, "test", change_feed="local")
+    email  = f"feed-{uuid.uuid4().hex[:8]}@example.com"
+    laptop = configure(config, Session())
+    sign_in(email, "password")
+    assert load_income("Jan 2026") == []
+    phone = configure(config, Session())
+    sign_in(email, "password")
+    add_income("Jan 2026", "Salary", "Active", 1000, "from the phone")
+    end_session()
+    configure(config, laptop)
+    assert [r["notes"] for r in month_cache().get(("income", 202601))] == ["from the phone"]
+    assert not laptop.errors and not phone.errors
+    end_session()
+
+
+def _settle(feed):
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), feed._loop).result(timeout=5)
+
+
+def _joined_feed(user_id, token, expires_at):
+    feed = SupabaseChangeFeed("http://realtime.invalid", "key")
+    client, channel = FakeClient(), FakeChannel()
+    feed._clients[user_id]  = client
+    feed._channels[user_id] = channel
+    feed._tokens[user_id]   = (expires_at, token)
+    return feed, client, channel
+
+
+def test_later_session_hands_its_newer_token_to_an_existing_channel():
+    feed, client, _ = _joined_feed("u1", "old", expires_at=100)
+    feed.subscribe("u1", Recorder(), access_token="new", expires_at=200)
+    feed.subscribe("u1", Recorder(), access_token="older", expires_at=50)
+    _settle(feed)
+    assert client.realtime.tokens == ["new"]
+    assert feed._tokens["u1"] == (200, "new")
+
+
+def test_closed_channel_is_left_and_resynced_on_rejoin():
+    feed, client, channel = _joined_feed("u1", "t", expires_at=100)
+    cache = MonthCache("u1", 10_000)
+    cache.put(("income", 202602), [{"id": 1}])
+    feed.subscribe("u1", cache)
+    feed._on_status("u1", channel, "CLOSED", None)
+    _settle(feed)
+    assert "u1" not in feed._channels and client.realtime.removed == [channel]
+    # The next session's subscribe rejoins; once joined, caches hear RESYNC.
+    rejoined = FakeChannel()
+    feed._channels["u1"] = rejoined
+    feed._on_status("u1", rejoined, "SUBSCRIBED", None)
+    assert ("income", 202602) not in cache
+    assert cache.lock_changes == 1
+    assert feed._dropped == set()
@@ -0,0 +1,22 @@
+import pytest
+
+from core.cli import build_parser
+from core.supabase_db import load_income
+
+
+def _import(tmp_path, text):
+    path = tmp_path / "income.csv"
+    path.write_text(text, encoding="utf-8")
+    args = build_parser().parse_args(["import", "income", str(path), "--month", "Jan 2026"])
+    args.func(args)
+
+
+def test_import_accepts_thousands_separators(signed_in, tmp_path):
+    _import(tmp_path, 'source,amount\nSalary,"1,500.50"\nSkill,₦200\n')
+    assert sorted(r["amount_kobo"] for r in load_income("Jan 2026")) == [20_000, 150_050]
+
+
+def test_import_names_the_bad_line(signed_in, tmp_path):
+    with pytest.raises(SystemExit, match=r"income.csv:3: unreadable amount 'n/a'"):
+        _import(tmp_path, "source,amount\nSalary,100\nSkill,n/a\n")
+    assert load_income("Jan 2026") == []
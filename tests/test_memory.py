@@ -0,0 +1,75 @@
+import weakref
+
+import pytest
+
+import core.memory as memory
+from core.cache import MonthCache
+from core.search import LocalSearchIndex, _index_bytes, _live_indexes
+
+
+class FakeShared:
+    def __init__(self, size):
+        self.size    = size
+        self.cleared = False
+
+    def clear(self):
+        self.cleared = True
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    monkeypatch.setattr(memory, "_sessions", {})
+    return memory._sessions
+
+
+def _usage(sessions, name, cache_bytes=0, state_bytes=0, last_seen=0):
+    cache = MonthCache(name, 10**9)
+    if cache_bytes:
+        cache.put(("income", 202601), ["x" * (cache_bytes - 6)])
+    usage = memory.SessionUsage(name, name, weakref.ref(cache), state_bytes=state_bytes, last_seen=last_seen)
+    sessions[id(cache)] = usage
+    return usage, cache
+
+
+def _shared(monkeypatch, size):
+    shared = FakeShared(size)
+    monkeypatch.setattr(memory, "SHARED_CACHES", [shared])
+    monkeypatch.setattr(memory, "shared_bytes", lambda: shared.size)
+    return shared
+
+
+def test_cold_sessions_are_evicted_first_and_the_current_one_never(sessions, monkeypatch):
+    _shared(monkeypatch, 0)
+    cold, cold_cache = _usage(sessions, "cold", cache_bytes=1000, last_seen=1)
+    warm, warm_cache = _usage(sessions, "warm", cache_bytes=1000, last_seen=2)
+    memory._enforce_budget(1500, keep=cold)
+    assert cold_cache.bytes > 0 and warm_cache.bytes == 0
+    assert warm.evictions == 1
+
+
+def test_shared_caches_cleared_only_when_that_fits_the_budget(sessions, monkeypatch):
+    shared = _shared(monkeypatch, 500)
+    keep, _ = _usage(sessions, "live", state_bytes=2000)
+    memory._enforce_budget(1000, keep=keep)
+    assert not shared.cleared           # state alone is over budget; clearing would not help
+    memory._enforce_budget(2200, keep=keep)
+    assert shared.cleared
+
+
+def test_sessions_sharing_a_session_id_are_tracked_apart(signed_in, monkeypatch):
+    monkeypatch.setattr(memory, "_sessions", {})
+    first = memory.track_session()
+    first_cache = signed_in.pop("month_cache")     # a second session: same session_id, new cache
+    second = memory.track_session()
+    assert first.session == second.session
+    assert first_cache is not signed_in["month_cache"]
+    assert len(memory._sessions) == 2
+
+
+def test_local_search_indexes_report_their_size():
+    index = LocalSearchIndex()
+    _live_indexes.add(index)
+    before = _index_bytes()
+    index.add("expense", [{"id": i, "month_year": "Jan 2026", "category": "Food", "amount_kobo": 100,
+                           "description": "lunch " * 20} for i in range(500)])
+    assert _index_bytes() > before > 0
@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+from core.money import parse_kobo, split_kobo, to_kobo, to_naira
+
+
+def test_parse_kobo_cleans_pasted_amounts():
+    assert parse_kobo("₦12,500.50") == 1_250_050
+    assert parse_kobo("1,500") == 150_000
+    assert parse_kobo(" 7.005 ") == 701
+    assert parse_kobo("") is None
+    assert parse_kobo("n/a") is None
+    assert parse_kobo("1.2.3") is None
+
+
+def test_to_kobo_rounds_half_up_without_float_error():
+    assert to_kobo(0.1 + 0.2) == 30
+    assert to_kobo("1234.565") == 123_457
+    assert to_kobo(Decimal("0.005")) == 1
+    assert to_kobo(None) == 0
+    assert to_naira(to_kobo("99.99")) == 99.99
+
+
+def test_split_kobo_parts_always_sum_to_the_total():
+    assert split_kobo(100, [1, 1, 1]) == [34, 33, 33]
+    assert split_kobo(1_000_001, [50, 30, 20]) == [500_001, 300_000, 200_000]
+    assert split_kobo(7, [0, 0]) == [0, 0]
+    for total in (0, 1, 99, 123_457):
+        assert sum(split_kobo(total, [40, 25, 20, 10, 5])) == total
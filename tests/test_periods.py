@@ -0,0 +1,25 @@
+from core.prefetch import adjacent_periods
+from core.supabase_db import month_range, period_key, period_label
+
+
+def test_period_key_round_trips():
+    assert period_key("Jan 2026") == 202601
+    assert period_key("Dec 2025") == 202512
+    assert period_label(202601) == "Jan 2026"
+    assert all(period_label(period_key(m)) == m for m in month_range("Nov 2025", "Feb 2026"))
+
+
+def test_period_keys_sort_chronologically():
+    months = month_range("Oct 2025", "Mar 2026")
+    assert sorted(months, key=period_key) == months
+
+
+def test_month_range_is_inclusive_either_way_round():
+    assert month_range("Nov 2025", "Feb 2026") == ["Nov 2025", "Dec 2025", "Jan 2026", "Feb 2026"]
+    assert month_range("Feb 2026", "Nov 2025") == month_range("Nov 2025", "Feb 2026")
+
+
+def test_adjacent_periods_cross_year_boundaries_nearest_first():
+    assert adjacent_periods("Jan 2026", 2) == [202512, 202602, 202511, 202603]
+    assert adjacent_periods("Dec 2025", 1) == [202511, 202601]
+    assert adjacent_periods("Jun 2026", 0) == []
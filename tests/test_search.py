@@ -0,0 +1,102 @@
+from core.changefeed import ChangeEvent
+from core.search import LocalSearchIndex, SearchQuery, search_ledger
+from core.supabase_db import add_expense, add_income
+
+
+def _seed():
+    add_expense("Feb 2026", "Education", 50000, "school fees")
+    add_expense("Mar 2026", "Food", 12000, "groceries")
+    add_income("Mar 2026", "Salary", "Active", 400000, "march pay")
+
+
+def test_text_search_through_postgrest(signed_in):
+    _seed()
+    rows, has_more = search_ledger(SearchQuery(text="school"))
+    assert not signed_in.errors
+    assert [r["notes"] for r in rows] == ["school fees"]
+    assert rows[0]["amount_kobo"] == 5_000_000
+    assert not has_more
+
+
+def test_filters_combine_with_text(signed_in):
+    _seed()
+    rows, _ = search_ledger(SearchQuery(text="groceries", kind="income"))
+    assert rows == []
+    rows, _ = search_ledger(SearchQuery(kind="expense", min_amount=20000))
+    assert [r["category"] for r in rows] == ["Education"]
+    rows, _ = search_ledger(SearchQuery(start_month="Mar 2026", end_month="Mar 2026"))
+    assert sorted(r["kind"] for r in rows) == ["expense", "income"]
+    assert not signed_in.errors
+
+
+def test_paging_is_newest_first_and_reports_more(signed_in):
+    _seed()
+    first, more = search_ledger(SearchQuery(), page=0, page_size=2)
+    second, last_more = search_ledger(SearchQuery(), page=1, page_size=2)
+    assert more and not last_more
+    assert [r["month_year"] for r in first + second] == ["Mar 2026", "Mar 2026", "Feb 2026"]
+
+
+def test_local_index_matches_postgrest_ordering():
+    index = LocalSearchIndex()
+    index.add("expense", [
+        {"id": 2, "month_year": "Feb 2026", "category": "Education", "amount_kobo": 5_000_000, "description": "school fees"},
+        {"id": 1, "month_year": "Mar 2026", "category": "Food", "amount_kobo": 1_200_000, "description": "school lunch"},
+    ])
+    index.add("income", [
+        {"id": 1, "month_year": "Mar 2026", "source": "Salary", "income_type": "Active", "amount_kobo": 40_000_000, "notes": ""},
+    ])
+    rows, _ = index.search(SearchQuery(text="school"))
+    assert [r["month_year"] for r in rows] == ["Mar 2026", "Feb 2026"]
+    rows, _ = index.search(SearchQuery(start_month="Mar 2026"))
+    assert [(r["kind"], r["id"]) for r in rows] == [("expense", "1"), ("income", "1")]
+
+
+def test_local_index_applies_changes_without_reloading():
+    loads = []
+    def history():
+        loads.append(1)
+        yield "expense", [{"id": 1, "month_year": "Jan 2026", "category": "Food", "amount_kobo": 100, "description": "rice"}]
+    index = LocalSearchIndex(loader=history)
+    assert [r["id"] for r in index.search(SearchQuery(text="rice"))[0]] == ["1"]
+    index.apply_change(ChangeEvent("expense", "INSERT", record={
+        "id": 2, "month_year": "Feb 2026", "category": "Food", "amount_kobo": 200, "description": "rice and beans"}))
+    index.apply_change(ChangeEvent("expense", "UPDATE", record={
+        "id": 1, "month_year": "Jan 2026", "category": "Food", "amount_kobo": 100, "description": "yam"}))
+    assert [r["id"] for r in index.search(SearchQuery(text="rice"))[0]] == ["2"]
+    index.apply_change(ChangeEvent("expense", "DELETE", old_record={"id": 2}))
+    assert index.search(SearchQuery(text="rice"))[0] == []
+    assert [r["notes"] for r in index.search(SearchQuery())[0]] == ["yam"]
+    assert len(loads) == 1
+    index.apply_change(ChangeEvent("expense", "RESYNC"))
+    assert [r["notes"] for r in index.search(SearchQuery())[0]] == ["rice"]
+    assert len(loads) == 2
+
+
+def test_local_backend_sees_new_writes(signed_in):
+    from core.runtime import Config, configure, get_config
+    configure(Config(get_config().supabase_url, "test", change_feed="local", search_backend="local"), signed_in)
+    _seed()
+    assert [r["notes"] for r in search_ledger(SearchQuery(text="school"))[0]] == ["school fees"]
+    add_expense("Apr 2026", "Education", 70000, "school bus")
+    rows, _ = search_ledger(SearchQuery(text="school"))
+    assert [r["notes"] for r in rows] == ["school bus", "school fees"]
+    assert not signed_in.errors
+
+
+def test_query_builder_sends_every_filter_in_one_request(signed_in, standin):
+    from urllib.parse import parse_qsl, urlsplit
+    search_ledger(SearchQuery(text="School fees!", kind="expense", categories=("Education", "Food"),
+                              min_amount=100, max_amount=2500.5, start_month="Jan 2026", end_month="Mar 2026"),
+                  page=2, page_size=10)
+    assert not signed_in.errors
+    method, path = [r for r in standin.RequestHandlerClass.store.requests if "/ledger_entries" in r[1]][-1]
+    params = parse_qsl(urlsplit(path).query)
+    assert method == "GET"
+    assert ("search_tsv", "fts(simple).school & fees") in params
+    assert ("kind", "eq.expense") in params
+    assert ("category", "in.(Education,Food)") in params
+    assert ("amount_kobo", "gte.10000") in params and ("amount_kobo", "lte.250050") in params
+    assert ("period", "gte.202601") in params and ("period", "lte.202603") in params
+    assert dict(params)["order"] == "period.desc,kind.asc,id.asc"
+    assert (dict(params)["offset"], dict(params)["limit"]) == ("20", "11")
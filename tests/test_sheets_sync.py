@@ -0,0 +1,58 @@
+from core.sheets_sync import content_hash, map_row, sync_worksheet
+from core.supabase_db import load_expense
+
+
+class FakeWorksheet:
+    def __init__(self, title, rows):
+        self.title = title
+        self.rows  = rows
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    def row_values(self, n):
+        return self.rows[n - 1]
+
+    def get(self, cells):
+        first, last = (int("".join(c for c in part if c.isdigit())) for part in cells.split(":"))
+        return self.rows[first - 1:last]
+
+
+HEADER = ["Month", "Category", "Amount", "Description"]
+
+
+def test_content_hash_is_stable_and_counts_occurrences():
+    row = map_row("expense", {"month": "Feb 2026", "category": "Food", "amount": "₦12,500.50", "description": ""})
+    assert row["amount_kobo"] == 1_250_050
+    assert content_hash("expense", row, 0) == content_hash("expense", dict(row), 0)
+    assert content_hash("expense", row, 0) != content_hash("expense", row, 1)
+    assert content_hash("expense", row, 0) != content_hash("income", row, 0)
+    assert content_hash("expense", row, 0) != content_hash("expense", {**row, "amount_kobo": 1}, 0)
+
+
+def test_blank_and_unparseable_rows_are_skipped():
+    assert map_row("expense", {"month": "", "category": "Food", "amount": "1"}) is None
+    assert map_row("expense", {"month": "Feb 2026", "category": "Food", "amount": "n/a"}) is None
+
+
+def test_resync_sends_only_new_rows_and_keeps_duplicates(signed_in):
+    sheet = FakeWorksheet("Expenses", [HEADER,
+        ["Feb 2026", "Food", "5000", "lunch"],
+        ["Feb 2026", "Food", "5000", "lunch"],
+    ])
+    assert sync_worksheet(sheet, "expense", chunk_rows=1)["inserted"] == 2
+    sheet.rows.append(["Mar 2026", "Rent", "100000", ""])
+    stats = sync_worksheet(sheet, "expense")
+    assert (stats["inserted"], stats["skipped"], stats["removed"]) == (1, 2, 0)
+
+
+def test_edited_row_replaces_the_old_one(signed_in, tmp_path):
+    sheet = FakeWorksheet("Expenses", [HEADER, ["Feb 2026", "School", "50000", "fees"]])
+    checkpoint = str(tmp_path / "sync.json")
+    sync_worksheet(sheet, "expense", checkpoint)
+    sheet.rows[1][2] = "60000"
+    stats = sync_worksheet(sheet, "expense", checkpoint)
+    assert (stats["inserted"], stats["removed"]) == (1, 1)
+    assert [r["amount_kobo"] for r in load_expense("Feb 2026")] == [6_000_000]
+    assert not signed_in.errors
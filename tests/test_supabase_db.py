@@ -0,0 +1,25 @@
+from core.supabase_db import add_income, delete_income, load_income, lock_month, locked_months
+
+
+def test_delete_then_load_on_same_connection(signed_in):
+    add_income("Jan 2026", "Salary", "Active", 1000, "")
+    row = load_income("Jan 2026")[0]
+    delete_income(row["id"])
+    assert load_income("Jan 2026") == []
+    lock_month("Jan 2026")
+    assert "Jan 2026" in locked_months()
+    assert not signed_in.errors
+
+
+def test_failed_lock_read_is_not_cached(signed_in, monkeypatch):
+    import core.supabase_db as db
+    lock_month("Jan 2026")
+    signed_in.pop("locked_months_cache", None)
+    fetch = db._fetch_locked_months
+    def fail():
+        raise ConnectionError("network down")
+    monkeypatch.setattr(db, "_fetch_locked_months", fail)
+    assert locked_months() == set()
+    assert signed_in.errors
+    monkeypatch.setattr(db, "_fetch_locked_months", fetch)
+    assert locked_months() == {"Jan 2026"}